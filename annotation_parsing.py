@@ -5,37 +5,70 @@ Author: Lily Wise
 This file parses annotation files for hpo and for go.
 """
 
+from sys import intern
+from parsing_utils import open_input
+
+
+# This function reads the hpo annotation file one line at a time, so the whole
+# file is never held in memory. It can read the file gzipped.
+#
+# param: filename - the hpo annotation file
+# return: generator of (gene id, gene symbol, term id) for each annotation
+def iter_hpo_annotations(filename):
+    file = open_input(filename)
+
+    for line in file:
+        if not line.startswith('#'):
+            columns = line.split('\t')
+            yield columns[0], columns[1], columns[3][0:10]
+
+    file.close()
+
 
 # This function parses the hpo annotation file. It pulls the gene annotation
 # and terms it is associated to.
 #
 # param: filename - the hpo annotation file
+# param: interner - if given, terms are given as their codes in this Interner
 # return: gene_term_id - a dictionary; key: gene, value: array of terms
-def hpo_parsing_ann(filename):
-    file = open(filename, "r")
+def hpo_parsing_ann(filename, interner=None):
+    term_id_of = intern if interner is None else interner.code
     gene_id_symbol = {}
     gene_term_id = {}
 
-    for line in file:
-        if not line.startswith('#'):
-            columns = line.split('\t')
-            gene_id = columns[0]
-            gene_symbol = columns[1]
-            term_id = columns[3][0:10]
-
-            if gene_id not in gene_id_symbol.keys():
-                gene_id_symbol[gene_id] = gene_symbol
-                gene_term_id[gene_symbol] = []
+    for gene_id, gene_symbol, term_id in iter_hpo_annotations(filename):
+        if gene_id not in gene_id_symbol:
+            gene_symbol = intern(gene_symbol)
+            gene_id_symbol[gene_id] = gene_symbol
+            gene_term_id[gene_symbol] = []
 
-            gene_term_id[gene_symbol].append(term_id)
+        gene_term_id[gene_symbol].append(term_id_of(term_id))
 
     return gene_term_id
 
 
+# This function reads the gene annotation file one line at a time, so the whole
+# file is never held in memory. It can read the file gzipped.
+#
+# param: filename - the gene annotation file
+# return: generator of (qualifier, gene, term, namespace, synonyms) for each
+# annotation
+def iter_gaf_annotations(filename):
+    file = open_input(filename)
+
+    for line in file:
+        if not line.startswith('!'):
+            cols = line.split('\t')
+            yield cols[3], cols[2], cols[4], cols[8], cols[10]
+
+    file.close()
+
+
 # This function parses the gene annotation file. It pulls the gene annotation
 # and terms it is associated to.
 #
 # param: filename - the gene annotation file
+# param: interner - if given, terms are given as their codes in this Interner
 # return: gene_syn - a dictionary; key: a gene, value: array of synonyms
 # return: bp_gene_terms - a biological process dictionary; key: a gene,
 # value: array of terms that the gene is annotated to
@@ -43,42 +76,37 @@ def hpo_parsing_ann(filename):
 # value: array of terms that the gene is annotated to
 # return: cc_gene_terms - a cellular component dictionary; key: a gene,
 # value: array of terms that the gene is annotated to
-def parsing_ann(filename):
-    file = open(filename, "r")
+def parsing_ann(filename, interner=None):
+    term_id_of = intern if interner is None else interner.code
     gene_syn = {}
     bp_gene_terms = {}
     mf_gene_terms = {}
     cc_gene_terms = {}
 
-    for line in file:
-        if not line.startswith('!'):
-            cols = line.split('\t')
-
-            if 'NOT' in cols[3]:
-                gene = cols[2]
-                term = cols[4]
-                namespace = cols[8]
-                synonym_col = cols[10]
-
-                if 'P' in namespace:
-                    if gene not in bp_gene_terms.keys():
-                        bp_gene_terms[gene] = set()
-                    bp_gene_terms[gene].add(term)
-                elif 'F' in namespace:
-                    if gene not in mf_gene_terms.keys():
-                        mf_gene_terms[gene] = set()
-                    mf_gene_terms[gene].add(term)
-                else:
-                    if gene not in cc_gene_terms.keys():
-                        cc_gene_terms[gene] = set()
-                    cc_gene_terms[gene].add(term)
-
-                if gene not in gene_syn.keys():
-                    gene_syn[gene] = set(gene)
-                synonyms = synonym_col.split('|')
-                for syn in synonyms:
-                    if syn not in gene_syn[gene]:
-                        gene_syn[gene].add(syn)
+    for qualifier, gene, term, namespace, synonym_col in iter_gaf_annotations(filename):
+        if 'NOT' in qualifier:
+            gene = intern(gene)
+            term = term_id_of(term)
+
+            if 'P' in namespace:
+                if gene not in bp_gene_terms:
+                    bp_gene_terms[gene] = set()
+                bp_gene_terms[gene].add(term)
+            elif 'F' in namespace:
+                if gene not in mf_gene_terms:
+                    mf_gene_terms[gene] = set()
+                mf_gene_terms[gene].add(term)
+            else:
+                if gene not in cc_gene_terms:
+                    cc_gene_terms[gene] = set()
+                cc_gene_terms[gene].add(term)
+
+            if gene not in gene_syn:
+                gene_syn[gene] = set(gene)
+            synonyms = synonym_col.split('|')
+            for syn in synonyms:
+                if syn not in gene_syn[gene]:
+                    gene_syn[gene].add(intern(syn))
 
     return gene_syn, bp_gene_terms, mf_gene_terms, cc_gene_terms
 
@@ -7,33 +7,20 @@ Calculates the frequent itemsets.
 
 from math import ceil, log10
 from itertools import combinations, permutations
+from multiprocessing import get_all_start_methods, get_context
+from bitsets import popcount
 
+# The vertical index and specificities in each worker process, set once when the worker starts
+worker_item_transactions = None
+worker_all_spec = None
 
-# This function calculates support of the itemset from transactions
-# param transactions: All transactions in a dictionary
-# param itemset: The itemset to calculate support
-# return: The support count of the itemset
-def weighted_support(transactions, itemset, all_spec):
-    support_count = 0
-
-    # Calculate support of an itemset by iterating over the frequent itemsets
-
-    # Loop through the transactions
-    for trans in transactions:
-        found_big = True  # For checking all items in the itemset are present
-
-        # Loop through the items in the itemset
-        for i in itemset:
-            found = False  # For checking just the current item in the itemset is present
-            # Loop through each yeast in the transaction
-            for t in transactions[trans]:
-                if i == t:
-                    found = True
-            if not found:
-                found_big = False
-        if found_big:
-            support_count += 1
 
+# This function weights the support count of an itemset by the specificity of its items
+# param itemset: The itemset the support count belongs to
+# param support_count: The number of transactions containing the itemset
+# param all_spec: dictionary; key: term, value: specificity
+# return: The weighted support of the itemset
+def weight_support_count(itemset, support_count, all_spec):
     support_weight = 2 * all_spec[itemset[0]] * all_spec[itemset[1]] * support_count
     if (all_spec[itemset[0]] + all_spec[itemset[1]]) != 0:
         support_weight /= (all_spec[itemset[0]] + all_spec[itemset[1]])
@@ -43,32 +30,43 @@ def weighted_support(transactions, itemset, all_spec):
     return support_weight
 
 
-# This function calculates support of the itemset from transactions
+# This function creates the vertical index of the transactions. Every item is mapped to the set of transactions
+# containing it, packed into an integer with one bit per transaction.
 # param transactions: All transactions in a dictionary
+# return: dictionary; key: item, value: packed set of the transactions containing the item
+def create_vertical_index(transactions):
+    item_transactions = {}
+
+    for index, trans in enumerate(transactions):
+        bit = 1 << index
+        for item in transactions[trans]:
+            if item in item_transactions:
+                item_transactions[item] |= bit
+            else:
+                item_transactions[item] = bit
+
+    return item_transactions
+
+
+# This function calculates support of the itemset from the vertical index
+# param item_transactions: The vertical index of the transactions
 # param itemset: The itemset to calculate support
 # return: The support count of the itemset
-def support(transactions, itemset):
-    support_count = 0
-
-    # Calculate support of an itemset by iterating over the frequent itemsets
+def vertical_support(item_transactions, itemset):
+    shared = -1
+    for item in itemset:
+        shared &= item_transactions.get(item, 0)
 
-    # Loop through the transactions
-    for trans in transactions:
-        found_big = True  # For checking all items in the itemset are present
+    return popcount(shared)
 
-        # Loop through the items in the itemset
-        for i in itemset:
-            found = False  # For checking just the current item in the itemset is present
-            # Loop through each yeast in the transaction
-            for t in transactions[trans]:
-                if i == t:
-                    found = True
-            if not found:
-                found_big = False
-        if found_big:
-            support_count += 1
 
-    return support_count
+# This function calculates weighted support of the itemset from the vertical index
+# param item_transactions: The vertical index of the transactions
+# param itemset: The itemset to calculate support
+# param all_spec: dictionary; key: term, value: specificity
+# return: The weighted support of the itemset
+def vertical_weighted_support(item_transactions, itemset, all_spec):
+    return weight_support_count(itemset, vertical_support(item_transactions, itemset), all_spec)
 
 
 # This function generates a combination from the frequent itemsets of size (itemset_size - 1) and accepts joined
@@ -157,17 +155,146 @@ def generate_candidate_itemsets(frequent_itemsets, itemset_size):
     return candidate_itemsets
 
 
+# This function generates the candidate itemsets of size 2 that go across the two sides of an association: one item
+# that can be on the left side and a different one that can be on the right side. Pairs of items that are only on the
+# same side are never generated.
+# param items: The frequent itemsets of size 1
+# param left_terms: The items that can be on the left side of an association
+# param right_terms: The items that can be on the right side of an association
+# return: The candidate itemsets of size 2, sorted
+def generate_cross_pairs(items, left_terms, right_terms):
+    right_items = [i for i in items if i in right_terms]
+    pairs = set()
+
+    for left in items:
+        if left in left_terms:
+            for right in right_items:
+                if left != right:
+                    pairs.add(tuple(sorted((left, right))))
+
+    return sorted(pairs)
+
+
+# This function keeps the candidate itemsets whose first two items go across the two sides of an association. The
+# weighted support of an itemset is worked out from its first two items, so an itemset larger than 2 is only counted
+# on a pair generate_cross_pairs() would have generated.
+# param candidate_itemsets: The candidate itemsets
+# param left_terms: The items that can be on the left side of an association
+# param right_terms: The items that can be on the right side of an association
+# return: The candidates that are kept, in order
+def prune_same_side(candidate_itemsets, left_terms, right_terms):
+    return [candidate for candidate in candidate_itemsets if crosses_sides(candidate, left_terms, right_terms)]
+
+
+# This function checks whether the first two items of an itemset go across the two sides of an association
+# param itemset: The itemset
+# param left_terms: The items that can be on the left side of an association
+# param right_terms: The items that can be on the right side of an association
+# return: True if one of the two items can be on the left side and the other on the right side
+def crosses_sides(itemset, left_terms, right_terms):
+    return (itemset[0] in left_terms and itemset[1] in right_terms) or \
+        (itemset[1] in left_terms and itemset[0] in right_terms)
+
+
+# This function keeps the candidate itemsets in which no item is an ancestor of another. Genes annotated to a term are
+# also annotated to all its ancestors, so such an itemset is frequent whenever its most specific items are, and says
+# nothing they do not.
+# param candidate_itemsets: The candidate itemsets
+# param all_parents: dictionary; key: item, value: all of its ancestors (transitively)
+# return: The candidates that are kept, in order
+def prune_lineage(candidate_itemsets, all_parents):
+    return [candidate for candidate in candidate_itemsets if not shares_lineage(candidate, all_parents)]
+
+
+# This function checks whether an item of an itemset is an ancestor of another of its items
+# param itemset: The itemset
+# param all_parents: dictionary; key: item, value: all of its ancestors (transitively)
+# return: True if two of the items are in the same lineage
+def shares_lineage(itemset, all_parents):
+    for item in itemset:
+        ancestors = all_parents.get(item)
+        if ancestors:
+            for other in itemset:
+                if other in ancestors:
+                    return True
+
+    return False
+
+
+# This function creates a pool of worker processes. Where processes can be forked, the workers share the parent's
+# memory, so the initializer arguments are not copied at all; otherwise they are pickled once per worker.
+# param workers: The number of worker processes
+# param initializer: The function each worker calls when it starts
+# param initargs: The arguments of the initializer
+# return: The pool of worker processes
+def create_worker_pool(workers, initializer, initargs):
+    if "fork" in get_all_start_methods():
+        context = get_context("fork")
+    else:
+        context = get_context()
+
+    return context.Pool(workers, initializer, initargs)
+
+
+# This function splits a list into about the given number of consecutive chunks
+# param items: The list to split
+# param chunk_count: The number of chunks wanted
+# return: The list of chunks, in order
+def split_chunks(items, chunk_count):
+    chunk_size = max(1, ceil(len(items) / chunk_count))
+
+    return [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+
+# This function sets the vertical index and specificities of a worker process
+# param item_transactions: The vertical index of the transactions
+# param all_spec: dictionary; key: term, value: specificity
+def init_weighted_support_worker(item_transactions, all_spec):
+    global worker_item_transactions, worker_all_spec
+    worker_item_transactions = item_transactions
+    worker_all_spec = all_spec
+
+
+# This function calculates the weighted support of a chunk of candidates in a worker process
+# param candidates: The candidate itemsets
+# return: The weighted supports of the candidates, in order
+def weighted_support_chunk(candidates):
+    return [vertical_weighted_support(worker_item_transactions, candidate, worker_all_spec)
+            for candidate in candidates]
+
+
+# This function turns the minimum thresholds given as fractions into the values itemsets are compared against
+# param transactions: The transactions based upon which support is calculated
+# param items: The unique set of items present in the transaction
+# param min_support: The minimum support, as a fraction of the transactions
+# param min_weighted_support: The minimum weighted support
+# param min_information_content: The minimum information content, as a fraction of the largest possible
+# return: The minimum support count, weighted support and information content
+def scale_thresholds(transactions, items, min_support, min_weighted_support, min_information_content):
+    min_support = ceil(min_support * len(transactions))
+    min_weighted_support = min_weighted_support / ceil(min_weighted_support * len(transactions))
+    min_information_content = min_information_content * -log10(1/len(items))
+
+    return min_support, min_weighted_support, min_information_content
+
+
 # This function generates a table of itemsets with all frequent items from transactions based on a given minimum support
 # param transactions: The transactions based upon which support is calculated
 # param items: The unique set of items present in the transaction
 # param min_support: The minimum support to find frequent itemsets
+# param left_terms: If given, only the items that can be on the left side of an association and right_terms are
+#  mined, and only itemsets whose first two items go across the two sides (see generate_cross_pairs)
+# param right_terms: The items that can be on the right side of an association, if left_terms is given
+# param all_parents: If given, candidates with an item that is an ancestor of another are not counted
 # return: The table of all frequent itemsets of different sizes
 def generate_all_frequent_itemsets(transactions, items, min_support, min_weighted_support,
-                                   min_information_content, all_spec, all_ic):
+                                   min_information_content, all_spec, all_ic, workers=1, left_terms=None,
+                                   right_terms=None, all_parents=None):
 
-    min_support = ceil(min_support * len(transactions))
-    min_weighted_support = min_weighted_support / ceil(min_weighted_support * len(transactions))
-    min_information_content = min_information_content * -log10(1/len(items))
+    min_support, min_weighted_support, min_information_content = \
+        scale_thresholds(transactions, items, min_support, min_weighted_support, min_information_content)
+
+    item_transactions = create_vertical_index(transactions)
 
     frequent_itemsets = dict()
     itemset_size = 0
@@ -184,8 +311,9 @@ def generate_all_frequent_itemsets(transactions, items, min_support, min_weighte
     for i in items:
         print(str(count))
         count += 1
-        list_ver = [i]
-        support_check = support(transactions, list_ver)
+        if left_terms is not None and i not in left_terms and i not in right_terms:
+            continue
+        support_check = popcount(item_transactions.get(i, 0))
         if support_check >= min_support and all_ic[i] >= min_information_content:
             frequent_itemsets[itemset_size].append(i)
 
@@ -196,22 +324,115 @@ def generate_all_frequent_itemsets(transactions, items, min_support, min_weighte
     # frequent itemsets of greater size
     itemset_size += 1
 
-    while frequent_itemsets[itemset_size - 1]:
-        frequent_itemsets[itemset_size] = list()
-        candidate_itemsets = generate_candidate_itemsets(frequent_itemsets, itemset_size)
-        pruned_itemset = set()
+    # Candidates are sharded across worker processes that each have the vertical index
+    pool = None
+    if workers > 1:
+        pool = create_worker_pool(workers, init_weighted_support_worker, (item_transactions, all_spec))
+
+    try:
+        while frequent_itemsets[itemset_size - 1]:
+            frequent_itemsets[itemset_size] = list()
+            if itemset_size == 2 and left_terms is not None:
+                candidate_itemsets = generate_cross_pairs(frequent_itemsets[1], left_terms, right_terms)
+            else:
+                candidate_itemsets = generate_candidate_itemsets(frequent_itemsets, itemset_size)
+                if left_terms is not None:
+                    candidate_itemsets = prune_same_side(candidate_itemsets, left_terms, right_terms)
+            if all_parents is not None:
+                candidate_itemsets = prune_lineage(candidate_itemsets, all_parents)
+            pruned_itemset = set()
+
+            if pool is None:
+                weighted_sups = [vertical_weighted_support(item_transactions, candidate, all_spec)
+                                 for candidate in candidate_itemsets]
+            else:
+                weighted_sups = []
+                for chunk_sups in pool.map(weighted_support_chunk, split_chunks(candidate_itemsets, workers * 4)):
+                    weighted_sups.extend(chunk_sups)
+
+            # Prune the candidate itemset if its support is less than minimum support
+            for candidate, weighted_sup in zip(candidate_itemsets, weighted_sups):
+                if weighted_sup >= min_weighted_support:
+                    pruned_itemset.add(candidate)
+
+            frequent_itemsets[itemset_size] = pruned_itemset
+            print("Finished itemsize " + str(itemset_size))
+            itemset_size += 1
+    finally:
+        # Close the pool even if a level fails, so no worker processes are left behind
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return frequent_itemsets
 
-        # Prune the candidate itemset if its support is less than minimum support
-        for candidate in candidate_itemsets:
-            weighted_sup = weighted_support(transactions, candidate, all_spec)
-            if weighted_sup >= min_weighted_support:
-                pruned_itemset.add(candidate)
 
-        frequent_itemsets[itemset_size] = pruned_itemset
-        print("Finished itemsize " + str(itemset_size))
+# This function finds the support of every frequent item and the weighted support of every larger frequent itemset
+# param transactions: The transactions the table was mined from
+# param frequent_itemsets: The table of all frequent itemsets of different sizes
+# param all_spec: dictionary; key: term, value: specificity
+# return: item_supports - dictionary; key: item, value: support count
+# return: weighted_supports - dictionary; key: itemset, value: weighted support
+def itemset_supports(transactions, frequent_itemsets, all_spec):
+    item_transactions = create_vertical_index(transactions)
+    item_supports = {}
+    weighted_supports = {}
+
+    for i in frequent_itemsets.get(1, []):
+        item_supports[i] = popcount(item_transactions[i])
+
+    for itemset_size in frequent_itemsets:
+        if itemset_size > 1:
+            for itemset in frequent_itemsets[itemset_size]:
+                weighted_supports[itemset] = vertical_weighted_support(item_transactions, itemset, all_spec)
+
+    return item_supports, weighted_supports
+
+
+# This function gives the table generate_all_frequent_itemsets would have found with higher thresholds, from a table
+# mined with lower thresholds and the supports of its itemsets. An itemset is kept the same way it is mined: items by
+# their support, pairs of kept items and larger itemsets that join two kept itemsets by their weighted support.
+# param frequent_itemsets: The table mined with lower (or equal) thresholds
+# param item_supports: dictionary; key: item, value: support count
+# param weighted_supports: dictionary; key: itemset, value: weighted support
+# param min_support: The minimum support count
+# param min_weighted_support: The minimum weighted support
+# return: The table of all frequent itemsets of different sizes for the higher thresholds
+def filter_frequent_itemsets(frequent_itemsets, item_supports, weighted_supports, min_support, min_weighted_support):
+    filtered_itemsets = dict()
+    filtered_itemsets[0] = list(frequent_itemsets[0])
+    filtered_itemsets[1] = [i for i in frequent_itemsets.get(1, []) if item_supports[i] >= min_support]
+
+    itemset_size = 2
+    while filtered_itemsets[itemset_size - 1]:
+        kept_smaller = set(filtered_itemsets[itemset_size - 1])
+        filtered_itemsets[itemset_size] = set()
+
+        for itemset in frequent_itemsets.get(itemset_size, []):
+            if weighted_supports[itemset] < min_weighted_support:
+                continue
+
+            if itemset_size == 2:
+                joined = itemset[0] in kept_smaller and itemset[1] in kept_smaller
+            else:
+                # Two itemsets of size (itemset_size - 1) join into this one if they are both subsets of it
+                kept_subsets = 0
+                for sub in combinations(itemset, itemset_size - 1):
+                    if sub in kept_smaller:
+                        kept_subsets += 1
+                joined = kept_subsets >= 2
+
+            if joined and itemset_size > 3:
+                for sub in combinations(itemset, itemset_size - 2):
+                    if sub not in filtered_itemsets[itemset_size - 2]:
+                        joined = False
+
+            if joined:
+                filtered_itemsets[itemset_size].add(itemset)
+
         itemset_size += 1
 
-    return frequent_itemsets
+    return filtered_itemsets
 
 
 # Calls other methods. The main apriori algorithm.
@@ -219,9 +440,14 @@ def generate_all_frequent_itemsets(transactions, items, min_support, min_weighte
 # param: gene_terms - dictionary; key: gene, value: set of terms
 # param: gene_set - the set of all distinct genes
 # param: min_support - the minimum support
+# param: workers - the number of processes the candidates are evaluated in
+# param: left_terms - if given, only itemsets across left_terms and right_terms are mined
+# param: right_terms - the terms that can be on the right side of an association, if left_terms is given
+# param: all_parents - if given, itemsets with a term and one of its ancestors are not mined
 # return: frequent_itemset_table[2] - the frequent itemsets of size 2
 def apriori(gene_terms, gene_set, min_support, min_weighted_support, min_information_content,
-            all_spec, all_ic):
+            all_spec, all_ic, workers=1, left_terms=None, right_terms=None, all_parents=None):
     frequent_itemset_table = generate_all_frequent_itemsets(gene_terms, gene_set, min_support, min_weighted_support,
-                                                            min_information_content, all_spec, all_ic)
+                                                            min_information_content, all_spec, all_ic, workers,
+                                                            left_terms, right_terms, all_parents)
     return frequent_itemset_table
@@ -0,0 +1,99 @@
+"""
+Filename: artefact_cache.py
+Author: Lily Wise
+
+Binary caches of data read from text files. A cache is only used while the files it was made from are unchanged.
+"""
+
+from hashlib import sha1
+import os
+import pickle
+
+cache_version = 1
+
+
+# Finds what is needed to tell whether a file has changed.
+#
+# param: filename - the file
+# return: (modification time, size, sha1 of the contents)
+def file_fingerprint(filename):
+    status = os.stat(filename)
+
+    return status.st_mtime, status.st_size, file_hash(filename)
+
+
+# Hashes the contents of a file.
+#
+# param: filename - the file
+# return: the sha1 of the contents, as hex
+def file_hash(filename):
+    digest = sha1()
+    file = open(filename, "rb")
+    block = file.read(1 << 20)
+    while block:
+        digest.update(block)
+        block = file.read(1 << 20)
+    file.close()
+
+    return digest.hexdigest()
+
+
+# Checks that a file still has the fingerprint it was cached with. The contents are only hashed again when the
+# modification time or size changed, so a file that was touched but not changed is still current.
+#
+# param: filename - the file
+# param: fingerprint - (modification time, size, sha1 of the contents) when the cache was made
+# return: True if the file is unchanged
+def file_unchanged(filename, fingerprint):
+    if not os.path.exists(filename):
+        return False
+
+    status = os.stat(filename)
+    mtime, size, digest = fingerprint
+    if status.st_mtime == mtime and status.st_size == size:
+        return True
+
+    return status.st_size == size and file_hash(filename) == digest
+
+
+# Writes data to a cache file, along with the fingerprints of the files it was made from.
+#
+# param: cache_filename - the cache file
+# param: source_filenames - the files the data was made from
+# param: data - the data to cache
+def write_cache(cache_filename, source_filenames, data):
+    header = {"version": cache_version, "sources": {}}
+    for filename in source_filenames:
+        header["sources"][filename] = file_fingerprint(filename)
+
+    temp_filename = cache_filename + ".tmp"
+    file = open(temp_filename, "wb")
+    pickle.dump(header, file, pickle.HIGHEST_PROTOCOL)
+    pickle.dump(data, file, pickle.HIGHEST_PROTOCOL)
+    file.close()
+    os.replace(temp_filename, cache_filename)
+
+
+# Reads data from a cache file if the files it was made from are unchanged.
+#
+# param: cache_filename - the cache file
+# param: source_filenames - the files the data was made from
+# return: the cached data, or None if there is no cache or it is stale
+def read_cache(cache_filename, source_filenames):
+    if not os.path.exists(cache_filename):
+        return None
+
+    file = open(cache_filename, "rb")
+    try:
+        header = pickle.load(file)
+        if header.get("version") != cache_version or set(header["sources"]) != set(source_filenames):
+            return None
+        for filename in source_filenames:
+            if not file_unchanged(filename, header["sources"][filename]):
+                return None
+
+        return pickle.load(file)
+    except (pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+        return None
+    finally:
+        file.close()
@@ -5,55 +5,52 @@ Author: Lily Wise
 This creates association and has other functions that are used to calculate the associations.
 """
 
+from heapq import heappush, heapreplace
+from apriori_algorithm import create_vertical_index, vertical_support, weight_support_count
+from bitsets import popcount
 
-# This function calculates the coverage given an association and all the itemsets.
+
+# This function calculates the coverage of a left value from the vertical index of all the itemsets, so the genes of
+# the left value are counted without scanning the itemsets.
 #
 # param: left_val - the left value of an association
-# param: all_itemsets - all of the itemsets given
-# return: the number of times the left_val appears in all the itemsets divided by the total number of itemsets
-def coverage(left_val, all_itemsets, all_spec):
-    count = 0
-
-    # Loop through all the itemsets and check if the left_val is in the itemset
-    for itemset in all_itemsets:
-        if left_val in all_itemsets[itemset]:
-            count += 1
+# param: item_transactions - the vertical index of all the itemsets; key: term, value: packed genes
+# param: coverages - dictionary of coverages already calculated; key: left value, value: coverage (is added to)
+# return: the number of itemsets the left_val appears in, weighted by its specificity
+def coverage(left_val, item_transactions, all_spec, coverages=None):
+    if coverages is not None and left_val in coverages:
+        return coverages[left_val]
 
     cover = 0
     if left_val in all_spec:
-        cover = count * all_spec[left_val] * 10
+        cover = popcount(item_transactions.get(left_val, 0)) * all_spec[left_val] * 10
+
+    if coverages is not None:
+        coverages[left_val] = cover
 
     return cover
 
 
-# This functions calculates the confidence of a given association.
+# This functions calculates the confidence of a given association from the vertical index of all the itemsets: the
+# number of genes with every term of the association, weighted by the specificity of the right term. The genes that
+# have every term are the intersection of the genes of each term.
 #
-# param: all_gt - all of the itemsets
+# param: item_transactions - the vertical index of all the itemsets; key: term, value: packed genes
 # param: association - the current association to calculate confidence for
+# param: counts - dictionary of counts already calculated; key: frozenset of terms, value: number of genes with all
+#  of them (is added to, so an association and its reverse are only counted once)
 #
-# returns: the confidence count as a decimal
-def confidence(all_gt, association, all_spec):
-    confidence_count = 0
-
-    # Calculate confidence of an association by iterating over the frequent itemsets
-
-    # Loop through the transactions
-    for trans in all_gt:
-        found_big = True  # For checking all items in the itemset are present
-        # Loop through the items in the itemset
-        for associate in association:
-            found = False  # For checking just the current item in the itemset is present
-            # Loop through each yeast in the transaction
-            for i in all_gt[trans]:
-                if i == associate:
-                    found = True
-            if not found:
-                found_big = False
-        if found_big:
-            confidence_count += 1
-
+# returns: the confidence as a decimal
+def confidence(item_transactions, association, all_spec, counts=None):
     conf = 0
-    if 1 in association and association[1] in all_spec:
+    if len(association) > 1 and association[1] in all_spec:
+        terms = frozenset(association)
+        if counts is None:
+            confidence_count = vertical_support(item_transactions, terms)
+        else:
+            if terms not in counts:
+                counts[terms] = vertical_support(item_transactions, terms)
+            confidence_count = counts[terms]
         conf = confidence_count * all_spec[association[1]] * 100
 
     return conf
@@ -70,13 +67,158 @@ def confidence(all_gt, association, all_spec):
 #
 # returns: the list of final associations that meets the requirements
 def create_associations(left_terms, right_terms, all_gt, freq_itemsets, min_confidence, min_coverage, all_spec):
-    final_associations = []
+    return list(iter_associations(left_terms, right_terms, all_gt, freq_itemsets, min_confidence, min_coverage,
+                                  all_spec))
+
+
+# Finds the same associations as create_associations, one frequent itemset at a time, so neither the frequent itemsets
+# nor the associations are held in memory. Only the counts and coverages of single terms are kept between itemsets.
+#
+# param: all_gt - all the itemsets originally read in
+# param: freq_itemsets - the frequent itemsets created by the apriori algorithm; anything that can be iterated
+# param: min_confidence - the minimum confidence, as a decimal
+# param: min_coverage - the minimum coverage, as a decimal
+# param: item_transactions - the vertical index of all_gt, if it was already created
+#
+# returns: generator of the associations that meet the requirements, in the order create_associations gives them
+def iter_associations(left_terms, right_terms, all_gt, freq_itemsets, min_confidence, min_coverage, all_spec,
+                      item_transactions=None):
+    if item_transactions is None:
+        item_transactions = create_vertical_index(all_gt)
+
+    coverages = {}
+    counts = {}
+    for itemset in freq_itemsets:
+        forward = list(itemset)
+        for associate in [forward, forward[::-1]]:
+            if confidence(item_transactions, associate, all_spec, counts) >= min_confidence \
+                    and coverage(associate[0], item_transactions, all_spec, coverages) >= min_coverage \
+                    and associate[0] in left_terms and associate[1] in right_terms:
+                yield associate
+
+        # The count of the whole itemset is not needed again
+        if len(forward) > 1:
+            counts.pop(frozenset(forward), None)
+
+
+# Calculates the confidence and the coverage of every association of the frequent itemsets.
+#
+# param: all_gt - all the itemsets originally read in
+# param: freq_itemsets - the frequent itemsets created by the apriori algorithm
+# param: scores - dictionary of scores already calculated; key: tuple of the association, value: (confidence,
+#  coverage). Is added to, so it can be given again for other frequent itemsets of the same itemsets.
+# param: item_transactions - the vertical index of all_gt, if it was already created
+#
+# returns: list of (association, confidence, coverage)
+def score_associations(all_gt, freq_itemsets, all_spec, scores=None, item_transactions=None):
+    if scores is None:
+        scores = {}
+    if item_transactions is None:
+        item_transactions = create_vertical_index(all_gt)
+
+    scored_associations = []
     associations = all_associations(freq_itemsets)
+    coverages = {}
+    counts = {}
 
     for associate in associations:
-        cur_confidence = confidence(all_gt, associate, all_spec)
-        cur_coverage = coverage(associate[0], all_gt, all_spec)
+        key = tuple(associate)
+        if key not in scores:
+            scores[key] = (confidence(item_transactions, associate, all_spec, counts),
+                           coverage(associate[0], item_transactions, all_spec, coverages))
+        cur_confidence, cur_coverage = scores[key]
+        scored_associations.append((associate, cur_confidence, cur_coverage))
+
+    return scored_associations
+
+
+# Finds the associations from a left term to a right term with the highest weighted support times confidence. The best
+# are kept in a heap of at most top_k associations. Once it is full, the lowest score in it is the score to beat, and an
+# association is skipped without counting its genes if even the number of genes of its least common term could not
+# reach it.
+#
+# param: all_gt - all the itemsets originally read in
+# param: freq_itemsets - the frequent itemsets created by the apriori algorithm
+# param: top_k - the number of associations wanted
+# param: item_transactions - the vertical index of all_gt, if it was already created
+#
+# returns: list of (association, score), highest score first
+def top_associations(left_terms, right_terms, all_gt, freq_itemsets, top_k, all_spec, item_transactions=None):
+    if item_transactions is None:
+        item_transactions = create_vertical_index(all_gt)
 
+    best = []  # heap of (score, association), lowest score first
+    counts = {}
+    for itemset in freq_itemsets:
+        forward = list(itemset)
+        for associate in [forward, forward[::-1]]:
+            if top_k <= 0 or len(associate) < 2 or associate[0] not in left_terms \
+                    or associate[1] not in right_terms:
+                continue
+
+            if len(best) == top_k:
+                bound_count = min(term_count(term, item_transactions, counts) for term in associate)
+                if association_score(forward, associate, bound_count, all_spec) < best[0][0]:
+                    continue
+
+            terms = frozenset(associate)
+            if terms not in counts:
+                counts[terms] = vertical_support(item_transactions, terms)
+            entry = (association_score(forward, associate, counts[terms], all_spec), tuple(associate))
+
+            if len(best) < top_k:
+                heappush(best, entry)
+            elif entry > best[0]:
+                heapreplace(best, entry)
+
+        # The count of the whole itemset is not needed again
+        if len(forward) > 1:
+            counts.pop(frozenset(forward), None)
+
+    return [(list(associate), score) for score, associate in sorted(best, reverse=True)]
+
+
+# Counts the genes of a term, from the vertical index of all the itemsets.
+#
+# param: term - the term
+# param: item_transactions - the vertical index of all the itemsets; key: term, value: packed genes
+# param: counts - dictionary of counts already calculated; key: frozenset of terms, value: number of genes with all
+#  of them (is added to)
+# returns: the number of genes with the term
+def term_count(term, item_transactions, counts):
+    terms = frozenset([term])
+    if terms not in counts:
+        counts[terms] = popcount(item_transactions.get(term, 0))
+
+    return counts[terms]
+
+
+# Scores an association by the weighted support of its itemset times its confidence.
+#
+# param: itemset - the frequent itemset the association was made from, in the order it was mined
+# param: association - the association
+# param: count - the number of genes with every term of the association
+# returns: the score
+def association_score(itemset, association, count, all_spec):
+    conf = 0
+    if association[1] in all_spec:
+        conf = count * all_spec[association[1]] * 100
+
+    return weight_support_count(itemset, count, all_spec) * conf
+
+
+# Keeps the scored associations that meet the minimum confidence and coverage requirements and go from a left term to
+# a right term.
+#
+# param: scored_associations - list of (association, confidence, coverage)
+# param: min_confidence - the minimum confidence, as a decimal
+# param: min_coverage - the minimum coverage, as a decimal
+#
+# returns: the list of final associations that meets the requirements
+def select_associations(left_terms, right_terms, scored_associations, min_confidence, min_coverage):
+    final_associations = []
+
+    for associate, cur_confidence, cur_coverage in scored_associations:
         if cur_confidence >= min_confidence and cur_coverage >= min_coverage \
                 and associate[0] in left_terms and associate[1] in right_terms:
             final_associations.append(associate)
@@ -84,6 +226,23 @@ def create_associations(left_terms, right_terms, all_gt, freq_itemsets, min_conf
     return final_associations
 
 
+# Leaves out the associations implied by a more specific one: an association from a left term to a right term is
+# implied by an association from the same left term to a descendant of the right term, since every gene annotated to
+# the descendant is also annotated to the right term.
+#
+# param: associations - the list of associations
+# param: all_parents - dictionary; key: term, value: all of its ancestors (transitively)
+# returns: the associations that are not implied by another, in order
+def collapse_implied_associations(associations, all_parents):
+    implied = {}
+    for associate in associations:
+        if associate[0] not in implied:
+            implied[associate[0]] = set()
+        implied[associate[0]].update(all_parents.get(associate[1], ()))
+
+    return [associate for associate in associations if associate[1] not in implied[associate[0]]]
+
+
 # Creates all possible associations with the frequent itemsets.
 #
 # param: freq_itemsets - the list of frequent itemsets created by the apriori algorithm
@@ -0,0 +1,336 @@
+"""
+Filename: benchmark.py
+Author: Lily Wise
+
+Times every stage of general_main on synthetic inputs shaped like the real ones: ontologies that are DAGs with the
+depth, fan-out and multiple parents of HPO and GO, and annotations skewed towards a few popular terms. The inputs are
+written in the same formats as input/, so the stages run exactly as they do on a release, and the time and peak memory
+of every stage are written as JSON, so runs can be compared from one change to the next.
+
+    python benchmark.py --scale small --scale medium --tree bp --output benchmark.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from ontology_parsing import hpo_parsing_onto, parsing_go
+from annotation_parsing import hpo_parsing_ann, parsing_ann
+from tree_modification import gene_to_all_parents, join_gt, calculate_ic, terms_to_all_parents, all_specificity, \
+    swap_key_value
+from association_creation import iter_associations, top_associations
+from parsing_utils import Interner
+from main import mining_algorithms, tree_sides, tree_transactions
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Sizes of the synthetic inputs; key: scale, value: (number of terms, number of genes)
+scales = {"small": (1000, 1000), "medium": (10000, 5000), "large": (100000, 20000)}
+
+# How the terms are split between the ontologies
+hp_share = 0.5
+go_shares = (("biological_process", "P", 0.5), ("molecular_function", "F", 0.25), ("cellular_component", "C", 0.25))
+go_roots = {"biological_process": 8150, "molecular_function": 3674, "cellular_component": 5575}
+
+
+# Generates the parents of a synthetic ontology. Every term after the root has a parent that came before it, so the
+# ontology is a DAG whose depth grows with the log of its size, as HPO and GO do. Half the parents are picked in
+# proportion to the children they already have, so a few terms have most of the children, and some terms get a second
+# parent.
+#
+# param: term_count - the number of terms
+# param: generator - the random.Random the parents are picked with
+# param: multi_parent - the chance a term has a second parent
+# return: list of the parents of each term, as places in the list
+def synthetic_parents(term_count, generator, multi_parent=0.3):
+    parents = [[]]
+    # Every term is in the pool once, and again for every child it has
+    pool = [0]
+    for term in range(1, term_count):
+        if generator.random() < 0.5:
+            parent = generator.choice(pool)
+        else:
+            parent = generator.randrange(0, term)
+        term_parents = [parent]
+
+        if term > 1 and generator.random() < multi_parent:
+            second = generator.randrange(0, term)
+            if second != parent:
+                term_parents.append(second)
+
+        parents.append(term_parents)
+        pool.extend(term_parents)
+        pool.append(term)
+
+    return parents
+
+
+# Picks the terms each gene is annotated to. Terms are given a popularity that falls off with their rank (a Zipf
+# distribution), and the number of terms of a gene is geometric, so most genes have a few terms and some have many.
+#
+# param: term_ids - the ids of the terms
+# param: gene_count - the number of genes
+# param: generator - the random.Random the terms are picked with
+# param: mean_terms - the mean number of terms of a gene
+# param: skew - the exponent of the Zipf distribution
+# return: list of the sets of term ids of each gene
+def synthetic_annotations(term_ids, gene_count, generator, mean_terms, skew=0.8):
+    ranked = list(term_ids)
+    generator.shuffle(ranked)
+    cumulative = []
+    total = 0
+    for rank in range(0, len(ranked)):
+        total += 1 / (rank + 1) ** skew
+        cumulative.append(total)
+
+    annotations = []
+    for gene in range(0, gene_count):
+        count = 1
+        while generator.random() > 1 / mean_terms:
+            count += 1
+        annotations.append(set(generator.choices(ranked, cum_weights=cumulative, k=count)))
+
+    return annotations
+
+
+# Writes synthetic hp.obo.txt, go.obo, hpo_genes_to_phenotype.txt and goa_human.gaf into a directory, in the formats the
+# parsers read.
+#
+# param: direct - the directory, which has to exist
+# param: term_count - the number of terms of all the ontologies together
+# param: gene_count - the number of genes
+# param: seed - the seed of the random numbers, so the same inputs are written for the same seed
+# return: dictionary of the file names, by the names main.py gives them
+def write_synthetic_inputs(direct, term_count, gene_count, seed=0):
+    generator = random.Random(seed)
+    genes = ["GENE" + str(gene) for gene in range(0, gene_count)]
+
+    hp_count = int(term_count * hp_share)
+    hp_ids = ["HP:%07d" % term for term in range(1, hp_count + 1)]
+    hp_parents = synthetic_parents(hp_count, generator)
+
+    filenames = {"hp_ontology": os.path.join(direct, "hp.obo.txt"), "g_ontology": os.path.join(direct, "go.obo"),
+                 "hp_annotations": os.path.join(direct, "hpo_genes_to_phenotype.txt"),
+                 "g_annotations": os.path.join(direct, "goa_human.gaf")}
+
+    lines = ["format-version: 1.2\n", "\n"]
+    for term in range(0, hp_count):
+        lines.append("[Term]\nid: " + hp_ids[term] + "\nname: term " + str(term) + "\n")
+        for parent in hp_parents[term]:
+            lines.append("is_a: " + hp_ids[parent] + " ! term " + str(parent) + "\n")
+        lines.append("\n")
+    write_lines(filenames["hp_ontology"], lines)
+
+    go_ids = {}
+    lines = ["format-version: 1.2\n", "\n"]
+    for namespace, aspect, share in go_shares:
+        count = max(1, int((term_count - hp_count) * share))
+        root = go_roots[namespace]
+        go_ids[aspect] = ["GO:%07d" % root] + ["GO:%07d" % (root * 100 + term) for term in range(1, count)]
+        go_parents = synthetic_parents(count, generator)
+        for term in range(0, count):
+            lines.append("[Term]\nid: " + go_ids[aspect][term] + "\nname: term\nnamespace: " + namespace + "\n")
+            for parent in go_parents[term]:
+                lines.append("is_a: " + go_ids[aspect][parent] + " ! term\n")
+            lines.append("\n")
+    write_lines(filenames["g_ontology"], lines)
+
+    lines = ["#gene_id\tgene_symbol\thpo_id\thpo_name\n"]
+    hp_annotations = synthetic_annotations(hp_ids, gene_count, generator, 10)
+    for gene in range(0, gene_count):
+        for term in sorted(hp_annotations[gene]):
+            lines.append(str(gene) + "\t" + genes[gene] + "\tname\t" + term + "\tx\n")
+    write_lines(filenames["hp_annotations"], lines)
+
+    # parsing_ann keeps the annotations with a NOT qualifier, so every line has one
+    lines = ["!gaf-version: 2.1\n"]
+    for namespace, aspect, share in go_shares:
+        go_annotations = synthetic_annotations(go_ids[aspect], gene_count, generator, 5)
+        for gene in range(0, gene_count):
+            for term in sorted(go_annotations[gene]):
+                lines.append("\t".join(["UniProtKB", "X" + str(gene), genes[gene], "NOT", term, "PMID:0", "IDA", "",
+                                        aspect, "name", genes[gene] + "|SYN" + str(gene), "protein", "taxon:9606",
+                                        "20200101", "UniProt", "", ""]) + "\n")
+    write_lines(filenames["g_annotations"], lines)
+
+    return filenames
+
+
+# Writes lines to a file at once.
+def write_lines(filename, lines):
+    file = open(filename, "w")
+    file.writelines(lines)
+    file.close()
+
+
+# Finds the most memory the process has used so far, in kilobytes, or None where it cannot be found.
+def peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS gives bytes instead of kilobytes
+    if sys.platform == "darwin":
+        peak //= 1024
+
+    return peak
+
+
+# Runs one stage and records its wall time and the peak memory of the process once it is done.
+#
+# param: stages - list the record of the stage is added to
+# param: name - the name of the stage
+# param: function - the stage
+# param: args - the arguments of the stage
+# return: what the stage returns
+def run_stage(stages, name, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    stages.append({"stage": name, "wall_seconds": time.perf_counter() - start, "peak_rss_kb": peak_rss_kb()})
+
+    return result
+
+
+# Runs the stages of general_main (with recreate_onto_ann and recreate_freq_itemsets "true") on inputs in a directory.
+#
+# param: filenames - the inputs, as write_synthetic_inputs gives them
+# param: tree - 'bp', 'mf', 'hp' or 'all'
+# param: algorithm - a name in main.mining_algorithms
+# param: top_k - if more than 0, the top_k associations are found instead of the ones over the thresholds
+# return: dictionary of the records of the stages, the sizes of the levels and the number of associations
+def benchmark_pipeline(filenames, tree, min_support, min_weighted_support, min_confidence, min_information_content,
+                       min_coverage, algorithm="apriori", top_k=0):
+    stages = []
+    terms = Interner()
+
+    hp_tree = run_stage(stages, "parse_hp_ontology", hpo_parsing_onto, filenames["hp_ontology"], terms)
+    bp_tree, mf_tree, cc_tree = run_stage(stages, "parse_go_ontology", parsing_go, filenames["g_ontology"], terms)
+    hp_gt = run_stage(stages, "parse_hp_annotations", hpo_parsing_ann, filenames["hp_annotations"], terms)
+    gene_syn, bp_gt, mf_gt, cc_gt = run_stage(stages, "parse_go_annotations", parsing_ann, filenames["g_annotations"],
+                                              terms)
+
+    trees = [hp_tree, bp_tree, mf_tree]
+    annotations = [hp_gt, bp_gt, mf_gt]
+    closures = run_stage(stages, "closure", lambda: [terms_to_all_parents(onto) for onto in trees])
+    term_genes = run_stage(stages, "propagation",
+                           lambda: [gene_to_all_parents(trees[onto], annotations[onto]) for onto in range(0, 3)])
+    term_ics = run_stage(stages, "ic", lambda: [calculate_ic(onto) for onto in term_genes])
+    term_specs = run_stage(stages, "specificity",
+                           lambda: [all_specificity(closures[onto], term_ics[onto]) for onto in range(0, 3)])
+
+    def transactions():
+        all_gt = terms.decode_values(join_gt(term_genes[0], term_genes[1], term_genes[2]))
+        gene_terms = [terms.decode_values(swap_key_value(onto)) for onto in term_genes]
+        all_spec = {}
+        all_ic = {}
+        for onto in range(0, 3):
+            all_spec.update(terms.decode_keys(term_specs[onto]))
+            all_ic.update(terms.decode_keys(term_ics[onto]))
+        possible_left, possible_right = tree_sides(tree, all_gt, gene_terms[1], gene_terms[2], gene_terms[0])
+
+        return tree_transactions(tree, all_gt, gene_terms[1], gene_terms[2], gene_terms[0]), all_spec, all_ic, \
+            possible_left, possible_right
+    tree_gt, all_spec, all_ic, possible_left, possible_right = run_stage(stages, "transactions", transactions)
+
+    all_terms = set().union(*tree_gt.values())
+    table = run_stage(stages, "mining", mining_algorithms[algorithm], tree_gt, all_terms, min_support,
+                      min_weighted_support, min_information_content, all_spec, all_ic)
+    freq_itemsets = [itemset for itemset_size in table if itemset_size > 1 for itemset in table[itemset_size]]
+
+    if top_k > 0:
+        association_count = len(run_stage(stages, "associations", top_associations, possible_left, possible_right,
+                                          tree_gt, freq_itemsets, top_k, all_spec))
+    else:
+        association_count = run_stage(stages, "associations",
+                                      lambda: sum(1 for associate in iter_associations(
+                                          possible_left, possible_right, tree_gt, freq_itemsets, min_confidence,
+                                          min_coverage, all_spec)))
+
+    return {"stages": stages, "levels": {str(itemset_size): len(table[itemset_size]) for itemset_size in table},
+            "genes": len(tree_gt), "terms": len(all_terms), "associations": association_count}
+
+
+# Writes the synthetic inputs of a scale into a temporary directory and times the stages on them.
+#
+# param: settings - dictionary of the arguments of write_synthetic_inputs and benchmark_pipeline
+# return: the settings, with the results of benchmark_pipeline
+def benchmark_scale(settings):
+    with tempfile.TemporaryDirectory() as direct:
+        start = time.perf_counter()
+        filenames = write_synthetic_inputs(direct, settings["term_count"], settings["gene_count"], settings["seed"])
+        generate_seconds = time.perf_counter() - start
+
+        result = benchmark_pipeline(filenames, settings["tree"], settings["min_support"],
+                                    settings["min_weighted_support"], settings["min_confidence"],
+                                    settings["min_information_content"], settings["min_coverage"],
+                                    settings["algorithm"], settings["top_k"])
+
+    result.update(settings)
+    result["generate_seconds"] = generate_seconds
+    result["total_seconds"] = sum(stage["wall_seconds"] for stage in result["stages"])
+
+    return result
+
+
+# Benchmarks every scale in its own process, so the peak memory of one scale is not the peak of an earlier one.
+#
+# param: settings_list - list of the settings of each scale
+# return: list of the results of benchmark_scale
+def run_benchmarks(settings_list):
+    results = []
+    for settings in settings_list:
+        pool = multiprocessing.Pool(1)
+        try:
+            results.append(pool.apply(benchmark_scale, (settings,)))
+        finally:
+            pool.close()
+            pool.join()
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Times every stage of general_main on synthetic inputs.")
+    parser.add_argument("--scale", action="append", choices=sorted(scales),
+                        help="a named size of the inputs; can be given more than once")
+    parser.add_argument("--terms", type=int, help="the number of terms, instead of a named scale")
+    parser.add_argument("--genes", type=int, help="the number of genes, instead of a named scale")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tree", default="bp", choices=["bp", "mf", "hp", "all"])
+    parser.add_argument("--algorithm", default="apriori", choices=sorted(mining_algorithms))
+    parser.add_argument("--support", type=float, default=0.1)
+    parser.add_argument("--weighted-support", type=float, default=0.1)
+    parser.add_argument("--confidence", type=float, default=0.02)
+    parser.add_argument("--information-content", type=float, default=0.3)
+    parser.add_argument("--coverage", type=float, default=0.1)
+    parser.add_argument("--top-k", type=int, default=0)
+    parser.add_argument("--output", help="the JSON file the results are written to, instead of the output")
+    arguments = parser.parse_args()
+
+    sizes = []
+    if arguments.terms is not None or arguments.genes is not None:
+        sizes.append(("custom", arguments.terms or scales["small"][0], arguments.genes or scales["small"][1]))
+    for scale in arguments.scale or ([] if sizes else ["small"]):
+        sizes.append((scale, scales[scale][0], scales[scale][1]))
+
+    results = run_benchmarks([{"scale": scale, "term_count": term_count, "gene_count": gene_count,
+                               "seed": arguments.seed, "tree": arguments.tree, "algorithm": arguments.algorithm,
+                               "min_support": arguments.support,
+                               "min_weighted_support": arguments.weighted_support,
+                               "min_confidence": arguments.confidence,
+                               "min_information_content": arguments.information_content,
+                               "min_coverage": arguments.coverage, "top_k": arguments.top_k}
+                              for scale, term_count, gene_count in sizes])
+
+    if arguments.output is None:
+        print(json.dumps(results, indent=2))
+    else:
+        output_file = open(arguments.output, "w")
+        json.dump(results, output_file, indent=2)
+        output_file.close()
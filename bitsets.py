@@ -0,0 +1,45 @@
+"""
+Filename: bitsets.py
+Author: Lily Wise
+
+Helpers for sets packed into python integers, where bit i is set when the member with index i is in the set.
+"""
+
+
+# Counts the members of a packed set.
+#
+# param: bits - the packed set
+# return: the number of bits that are set
+def popcount(bits):
+    return bin(bits).count("1")
+
+
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+
+
+# Packs a collection of indices into a single integer.
+#
+# param: indices - iterable of member indices
+# return: the packed set
+def indices_to_bits(indices):
+    bits = 0
+    for index in indices:
+        bits |= 1 << index
+
+    return bits
+
+
+# Lists the indices of the members of a packed set, smallest first.
+#
+# param: bits - the packed set
+# return: list of member indices
+def bits_to_indices(bits):
+    indices = []
+    binary = bin(bits)[:1:-1]
+    index = binary.find("1")
+    while index != -1:
+        indices.append(index)
+        index = binary.find("1", index + 1)
+
+    return indices
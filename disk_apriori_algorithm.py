@@ -0,0 +1,371 @@
+"""
+Filename: disk_apriori_algorithm.py
+Author: Lily Wise
+
+Calculates the frequent itemsets the same way as apriori(), but keeps each level of itemsets, and the candidates
+joined from it, in files on disk instead of in memory. Items are numbered by their place in the sorted frequent items,
+so an itemset of size k is k integers, and every level is written as a sorted run of them that is read back through a
+memory map. Candidates are made, sorted and counted in chunks that fit in a memory cap, so apart from the vertical
+index of the frequent items only about one chunk of itemsets is held in memory at a time.
+"""
+
+from array import array
+from heapq import merge
+from itertools import combinations
+import mmap
+import tempfile
+from apriori_algorithm import create_vertical_index, scale_thresholds, weight_support_count, create_worker_pool, \
+    init_weighted_support_worker, weighted_support_chunk, split_chunks, shares_lineage, crosses_sides
+from bitsets import popcount
+
+# The memory cap used if none is given, in bytes
+default_memory_cap = 1 << 30
+
+# About how many bytes an itemset takes in memory: a tuple, plus a pointer for each item
+itemset_overhead = 64
+item_overhead = 8
+
+
+# A file of itemsets of one size, each as integers, sorted and without repeats. It is written once, from the smallest
+# itemset to the largest, and then read through a memory map.
+class SortedRun:
+
+    def __init__(self, width, directory=None):
+        self.width = width
+        self.file = tempfile.TemporaryFile(dir=directory)
+        self.count = 0
+        self.map = None
+        self.view = None
+
+    def __len__(self):
+        return self.count
+
+    # Adds itemsets to the end of the run. They must all come after the itemsets already in it.
+    #
+    # param: records - the itemsets, as tuples of integers
+    def write(self, records):
+        values = array("i")
+        for record in records:
+            values.extend(record)
+        values.tofile(self.file)
+        self.count += len(values) // self.width
+
+    # Finishes writing the run and maps it into memory to be read.
+    def finish(self):
+        self.file.flush()
+        if self.count > 0:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.view = memoryview(self.map).cast("i")
+
+    # Removes the run from disk.
+    def close(self):
+        if self.view is not None:
+            self.view.release()
+            self.map.close()
+        self.file.close()
+
+    # Finds an itemset of the run by its place in the run.
+    #
+    # param: index - the place of the itemset
+    # return: the itemset, as a tuple of integers
+    def record(self, index):
+        start = index * self.width
+        return tuple(self.view[start:start + self.width])
+
+    def __iter__(self):
+        for index in range(0, self.count):
+            yield self.record(index)
+
+    # Checks whether an itemset is in the run, by binary search.
+    def __contains__(self, record):
+        low = 0
+        high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.record(middle) < record:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low < self.count and self.record(low) == record
+
+
+# A level of the table of frequent itemsets that is kept in a SortedRun. It is used like the set of itemsets of a level
+# apriori() gives: it can be iterated, measured and checked for an itemset, with the items as terms.
+class DiskLevel:
+
+    def __init__(self, run, names, name_index):
+        self.run = run
+        self.names = names
+        self.name_index = name_index
+
+    def __len__(self):
+        return len(self.run)
+
+    def __iter__(self):
+        for record in self.run:
+            yield tuple(self.names[i] for i in record)
+
+    def __contains__(self, itemset):
+        record = []
+        for item in itemset:
+            if item not in self.name_index:
+                return False
+            record.append(self.name_index[item])
+
+        return tuple(sorted(record)) in self.run
+
+
+# This function sorts records of one size, leaving out repeats. Records are sorted in chunks; if there is more than
+# one chunk, each sorted chunk is written to its own run on disk and the runs are merged.
+# param records: The records, as tuples of integers
+# param width: The size of the records
+# param chunk_size: The most records held in memory at a time
+# param directory: The directory the runs are written to, or None for the system's
+# return: generator of the records, in order
+def external_sort(records, width, chunk_size, directory):
+    runs = []
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            runs.append(spill_chunk(chunk, width, directory))
+            chunk = []
+
+    if not runs:
+        for record in sorted(set(chunk)):
+            yield record
+        return
+
+    if chunk:
+        runs.append(spill_chunk(chunk, width, directory))
+
+    previous = None
+    for record in merge(*runs):
+        if record != previous:
+            yield record
+            previous = record
+
+    for run in runs:
+        run.close()
+
+
+# This function sorts a chunk of records and writes it to a run on disk
+# param chunk: The records, as tuples of integers
+# param width: The size of the records
+# param directory: The directory the run is written to, or None for the system's
+# return: The SortedRun of the chunk
+def spill_chunk(chunk, width, directory):
+    run = SortedRun(width, directory)
+    run.write(sorted(set(chunk)))
+    run.finish()
+
+    return run
+
+
+# This function generates the candidate pairs of the frequent items, in order. If left_terms is given, only pairs of a
+# left term and a different right term are generated, as generate_cross_pairs() does.
+# param names: The frequent items, sorted
+# param left_terms: The items that can be on the left side of an association, or None
+# param right_terms: The items that can be on the right side of an association
+# return: generator of the pairs, as tuples of item numbers
+def candidate_pairs(names, left_terms, right_terms):
+    for first in range(0, len(names)):
+        for second in range(first + 1, len(names)):
+            if left_terms is None or (names[first] in left_terms and names[second] in right_terms) \
+                    or (names[second] in left_terms and names[first] in right_terms):
+                yield first, second
+
+
+# This function joins every two itemsets of a level that share all but one item, as apriori() does. Each itemset is
+# split into each of its subsets one item smaller and the item left over; once these are sorted, the itemsets that
+# share a subset are next to each other, and every two of them are joined.
+# param level: The SortedRun of the itemsets of size (itemset_size - 1)
+# param itemset_size: The size of joined itemsets
+# param chunk_size: The most records held in memory at a time
+# param directory: The directory runs are written to, or None for the system's
+# return: generator of the joined itemsets, as sorted tuples of item numbers, with repeats
+def joined_candidates(level, itemset_size, chunk_size, directory):
+    shared = None
+    members = []
+    for record in external_sort(split_itemsets(level), itemset_size - 1, chunk_size, directory):
+        if record[:-1] != shared:
+            for joined in join_members(shared, members):
+                yield joined
+            shared = record[:-1]
+            members = []
+        members.append(record[-1])
+
+    for joined in join_members(shared, members):
+        yield joined
+
+
+# This function splits every itemset of a level into each of its subsets one item smaller and the item left over
+# param level: The SortedRun of a level
+# return: generator of the subsets, each followed by the item left over
+def split_itemsets(level):
+    for itemset in level:
+        for drop in range(0, len(itemset)):
+            yield itemset[:drop] + itemset[drop + 1:] + (itemset[drop],)
+
+
+# This function joins every two itemsets that share a subset
+# param shared: The subset the itemsets share, or None if there are none
+# param members: The item each itemset has besides the subset
+# return: generator of the joined itemsets, as sorted tuples
+def join_members(shared, members):
+    if shared is None:
+        return
+    for first in range(0, len(members)):
+        for second in range(first + 1, len(members)):
+            yield tuple(sorted(shared + (members[first], members[second])))
+
+
+# This function keeps the candidates whose subsets two items smaller are all frequent, for itemsets larger than 3
+# param candidates: The candidates, as tuples of item numbers
+# param smaller_level: The SortedRun of the itemsets of size (itemset_size - 2), or None for itemsets of size 3 or less
+# return: The candidates that are kept, in order
+def prune_candidates(candidates, smaller_level):
+    if smaller_level is None:
+        return candidates
+
+    pruned = []
+    for candidate in candidates:
+        if all(sub in smaller_level for sub in combinations(candidate, len(candidate) - 2)):
+            pruned.append(candidate)
+
+    return pruned
+
+
+# This function generates a table of itemsets with all frequent items from transactions based on a given minimum support
+# param transactions: The transactions based upon which support is calculated
+# param items: The unique set of items present in the transaction
+# param min_support: The minimum support to find frequent itemsets
+# param left_terms: If given, only itemsets whose first two items go across left_terms and right_terms are mined
+# param right_terms: The items that can be on the right side of an association, if left_terms is given
+# param all_parents: If given, candidates with an item that is an ancestor of another are not counted
+# param memory_cap: About the most bytes of itemsets held in memory at a time
+# param directory: The directory the levels are written to, or None for the system's
+# return: The table of all frequent itemsets of different sizes; levels larger than 1 are DiskLevels
+def generate_all_frequent_itemsets(transactions, items, min_support, min_weighted_support,
+                                   min_information_content, all_spec, all_ic, workers=1, left_terms=None,
+                                   right_terms=None, all_parents=None, memory_cap=default_memory_cap,
+                                   directory=None):
+
+    min_support, min_weighted_support, min_information_content = \
+        scale_thresholds(transactions, items, min_support, min_weighted_support, min_information_content)
+
+    item_transactions = create_vertical_index(transactions)
+
+    frequent_itemsets = dict()
+    frequent_itemsets[0] = [frozenset()]
+
+    # Frequent itemsets of size 1
+    frequent_itemsets[1] = list()
+    for i in items:
+        if left_terms is not None and i not in left_terms and i not in right_terms:
+            continue
+        if popcount(item_transactions.get(i, 0)) >= min_support and all_ic[i] >= min_information_content:
+            frequent_itemsets[1].append(i)
+    frequent_itemsets[1] = sorted(frequent_itemsets[1])
+
+    print("Finished itemsize 1")
+
+    # From here on items are their numbers, with their transactions and specificities
+    names = frequent_itemsets[1]
+    name_index = {names[index]: index for index in range(0, len(names))}
+    number_transactions = {index: item_transactions[names[index]] for index in range(0, len(names))}
+    number_spec = {index: all_spec[names[index]] for index in range(0, len(names))}
+    number_parents = None
+    if all_parents is not None:
+        number_parents = {index: set(name_index[parent] for parent in all_parents.get(names[index], ())
+                                     if parent in name_index) for index in range(0, len(names))}
+
+    pool = None
+    if workers > 1:
+        pool = create_worker_pool(workers, init_weighted_support_worker, (number_transactions, number_spec))
+
+    levels = {}
+    itemset_size = 2
+    try:
+        while itemset_size == 2 or len(levels[itemset_size - 1]) > 0:
+            chunk_size = max(1, memory_cap // (itemset_overhead + item_overhead * itemset_size))
+
+            if itemset_size == 2:
+                candidates = candidate_pairs(names, left_terms, right_terms)
+            else:
+                candidates = external_sort(joined_candidates(levels[itemset_size - 1], itemset_size, chunk_size,
+                                                             directory), itemset_size, chunk_size, directory)
+            smaller_level = levels[itemset_size - 2] if itemset_size > 3 else None
+
+            level = SortedRun(itemset_size, directory)
+            chunk = []
+            for candidate in candidates:
+                if number_parents is not None and shares_lineage(candidate, number_parents):
+                    continue
+                if left_terms is not None and itemset_size > 2 and \
+                        not crosses_sides((names[candidate[0]], names[candidate[1]]), left_terms, right_terms):
+                    continue
+                chunk.append(candidate)
+                if len(chunk) >= chunk_size:
+                    level.write(frequent_chunk(prune_candidates(chunk, smaller_level), number_transactions,
+                                               number_spec, min_weighted_support, pool, workers))
+                    chunk = []
+            level.write(frequent_chunk(prune_candidates(chunk, smaller_level), number_transactions, number_spec,
+                                       min_weighted_support, pool, workers))
+            level.finish()
+
+            levels[itemset_size] = level
+            frequent_itemsets[itemset_size] = DiskLevel(level, names, name_index)
+            print("Finished itemsize " + str(itemset_size))
+            itemset_size += 1
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return frequent_itemsets
+
+
+# This function keeps the candidates of a chunk whose weighted support is at least the minimum
+# param chunk: The candidates, as tuples of item numbers
+# param number_transactions: The vertical index by item number
+# param number_spec: dictionary; key: item number, value: specificity
+# param min_weighted_support: The minimum weighted support
+# param pool: The pool of worker processes, or None
+# param workers: The number of worker processes
+# return: The frequent candidates, in order
+def frequent_chunk(chunk, number_transactions, number_spec, min_weighted_support, pool, workers):
+    if pool is None:
+        weighted_sups = []
+        for candidate in chunk:
+            shared = -1
+            for item in candidate:
+                shared &= number_transactions[item]
+            weighted_sups.append(weight_support_count(candidate, popcount(shared), number_spec))
+    else:
+        weighted_sups = []
+        for chunk_sups in pool.map(weighted_support_chunk, split_chunks(chunk, workers * 4)):
+            weighted_sups.extend(chunk_sups)
+
+    return [candidate for candidate, weighted_sup in zip(chunk, weighted_sups) if weighted_sup >= min_weighted_support]
+
+
+# Calls other methods. The apriori algorithm with its levels kept on disk, with the same parameters as apriori().
+#
+# param: gene_terms - dictionary; key: gene, value: set of terms
+# param: gene_set - the set of all distinct genes
+# param: min_support - the minimum support
+# param: workers - the number of processes the candidates are evaluated in
+# param: left_terms - if given, only itemsets across left_terms and right_terms are mined
+# param: right_terms - the terms that can be on the right side of an association, if left_terms is given
+# param: all_parents - if given, itemsets with a term and one of its ancestors are not mined
+# param: memory_cap - about the most bytes of itemsets held in memory at a time
+# return: frequent_itemset_table - the frequent itemsets of every size
+def disk_apriori(gene_terms, gene_set, min_support, min_weighted_support, min_information_content,
+                 all_spec, all_ic, workers=1, left_terms=None, right_terms=None, all_parents=None,
+                 memory_cap=default_memory_cap):
+    frequent_itemset_table = generate_all_frequent_itemsets(gene_terms, gene_set, min_support, min_weighted_support,
+                                                            min_information_content, all_spec, all_ic, workers,
+                                                            left_terms, right_terms, all_parents, memory_cap)
+    return frequent_itemset_table
@@ -0,0 +1,188 @@
+"""
+Filename: eclat_algorithm.py
+Author: Lily Wise
+
+Calculates the frequent itemsets from the vertical index (Eclat). Gives the same table as apriori(): the candidates of
+every size are the ones apriori() joins and prunes, but the transactions of a candidate are the intersection of the
+transactions of the two itemsets it was joined from, so no itemset is intersected item by item again.
+"""
+
+from itertools import combinations
+from apriori_algorithm import create_vertical_index, scale_thresholds, weight_support_count, create_worker_pool, \
+    split_chunks, generate_cross_pairs, shares_lineage, crosses_sides
+from bitsets import popcount
+
+
+# The packed transactions of the last level and the thresholds in each worker process, set when the workers start
+worker_level_bits = None
+worker_min_weighted_support = None
+worker_all_spec = None
+
+
+# This function joins every two itemsets of a level that share all but one item, as apriori() does. Itemsets are
+# grouped by each of their subsets one item smaller, and every two itemsets in a group are joined.
+# param level: The itemsets of size (itemset_size - 1), as sorted tuples
+# param itemset_size: The size of joined itemsets
+# return: List of (joined itemset, index in level of one itemset joined, index of the other), sorted by itemset
+def join_level(level, itemset_size):
+    groups = dict()
+    for index in range(0, len(level)):
+        for shared in combinations(level[index], itemset_size - 2):
+            if shared not in groups:
+                groups[shared] = []
+            groups[shared].append(index)
+
+    joined = dict()
+    for shared in groups:
+        members = groups[shared]
+        for first in range(0, len(members)):
+            for second in range(first + 1, len(members)):
+                itemset = tuple(sorted(set(level[members[first]]).union(level[members[second]])))
+                if itemset not in joined:
+                    joined[itemset] = (members[first], members[second])
+
+    return [(itemset, joined[itemset][0], joined[itemset][1]) for itemset in sorted(joined)]
+
+
+# This function keeps the candidates whose subsets two items smaller are all frequent, as apply_apriori_pruning()
+# does for itemsets larger than 3
+# param candidates: List of (itemset, index of one itemset joined, index of the other)
+# param frequent_itemsets: The table of frequent itemsets discovered
+# param itemset_size: The size of the candidates
+# return: The candidates that are kept, in order
+def prune_candidates(candidates, frequent_itemsets, itemset_size):
+    if itemset_size <= 3:
+        return candidates
+
+    smaller = set(frequent_itemsets[itemset_size - 2])
+    pruned = []
+    for candidate in candidates:
+        if all(sub in smaller for sub in combinations(candidate[0], itemset_size - 2)):
+            pruned.append(candidate)
+
+    return pruned
+
+
+# This function keeps the candidates whose weighted support is at least the minimum
+# param candidates: List of (itemset, index of one itemset joined, index of the other)
+# param level_bits: The packed transactions of every itemset of the level the candidates were joined from
+# param min_weighted_support: The minimum weighted support
+# param all_spec: dictionary; key: term, value: specificity
+# return: The frequent candidates, in order
+def frequent_candidates(candidates, level_bits, min_weighted_support, all_spec):
+    frequent = []
+    for candidate in candidates:
+        itemset, first, second = candidate
+        if weight_support_count(itemset, popcount(level_bits[first] & level_bits[second]),
+                                all_spec) >= min_weighted_support:
+            frequent.append(candidate)
+
+    return frequent
+
+
+# This function sets the packed transactions of the last level and the thresholds of a worker process
+# param level_bits: The packed transactions of every itemset of the last level
+# param min_weighted_support: The minimum weighted support
+# param all_spec: dictionary; key: term, value: specificity
+def init_eclat_worker(level_bits, min_weighted_support, all_spec):
+    global worker_level_bits, worker_min_weighted_support, worker_all_spec
+    worker_level_bits = level_bits
+    worker_min_weighted_support = min_weighted_support
+    worker_all_spec = all_spec
+
+
+# This function keeps, in a worker process, the frequent candidates of a chunk
+# param candidates: List of (itemset, index of one itemset joined, index of the other)
+# return: The frequent candidates, in order
+def frequent_candidates_worker(candidates):
+    return frequent_candidates(candidates, worker_level_bits, worker_min_weighted_support, worker_all_spec)
+
+
+# This function generates a table of itemsets with all frequent items from transactions based on a given minimum support
+# param transactions: The transactions based upon which support is calculated
+# param items: The unique set of items present in the transaction
+# param min_support: The minimum support to find frequent itemsets
+# param left_terms: If given, only the items that can be on the left side of an association and right_terms are
+#  mined, and only itemsets whose first two items go across the two sides
+# param right_terms: The items that can be on the right side of an association, if left_terms is given
+# param all_parents: If given, candidates with an item that is an ancestor of another are not counted
+# return: The table of all frequent itemsets of different sizes
+def generate_all_frequent_itemsets(transactions, items, min_support, min_weighted_support,
+                                   min_information_content, all_spec, all_ic, workers=1, left_terms=None,
+                                   right_terms=None, all_parents=None):
+
+    min_support, min_weighted_support, min_information_content = \
+        scale_thresholds(transactions, items, min_support, min_weighted_support, min_information_content)
+
+    item_transactions = create_vertical_index(transactions)
+
+    frequent_itemsets = dict()
+    frequent_itemsets[0] = [frozenset()]
+
+    # Frequent itemsets of size 1
+    frequent_itemsets[1] = list()
+    for i in items:
+        if left_terms is not None and i not in left_terms and i not in right_terms:
+            continue
+        if popcount(item_transactions.get(i, 0)) >= min_support and all_ic[i] >= min_information_content:
+            frequent_itemsets[1].append(i)
+    frequent_itemsets[1] = sorted(frequent_itemsets[1])
+
+    print("Finished itemsize 1")
+
+    # Frequent itemsets of greater size, one level at a time, with the packed transactions of the last level
+    level = [(i,) for i in frequent_itemsets[1]]
+    level_bits = [item_transactions[i] for i in frequent_itemsets[1]]
+    itemset_size = 2
+    while level:
+        if itemset_size == 2 and left_terms is not None:
+            item_index = {frequent_itemsets[1][index]: index for index in range(0, len(frequent_itemsets[1]))}
+            candidates = [(pair, item_index[pair[0]], item_index[pair[1]])
+                          for pair in generate_cross_pairs(frequent_itemsets[1], left_terms, right_terms)]
+        else:
+            candidates = prune_candidates(join_level(level, itemset_size), frequent_itemsets, itemset_size)
+            if left_terms is not None:
+                candidates = [candidate for candidate in candidates
+                              if crosses_sides(candidate[0], left_terms, right_terms)]
+        if all_parents is not None:
+            candidates = [candidate for candidate in candidates if not shares_lineage(candidate[0], all_parents)]
+
+        if workers > 1 and candidates:
+            # A pool is forked for each level, so the workers share the packed transactions of that level
+            pool = create_worker_pool(workers, init_eclat_worker, (level_bits, min_weighted_support, all_spec))
+            try:
+                frequent = []
+                for chunk_frequent in pool.map(frequent_candidates_worker, split_chunks(candidates, workers * 4)):
+                    frequent.extend(chunk_frequent)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            frequent = frequent_candidates(candidates, level_bits, min_weighted_support, all_spec)
+
+        frequent_itemsets[itemset_size] = set(itemset for itemset, first, second in frequent)
+        level = [itemset for itemset, first, second in frequent]
+        level_bits = [level_bits[first] & level_bits[second] for itemset, first, second in frequent]
+
+        print("Finished itemsize " + str(itemset_size))
+        itemset_size += 1
+
+    return frequent_itemsets
+
+
+# Calls other methods. The main eclat algorithm, with the same parameters and table as apriori().
+#
+# param: gene_terms - dictionary; key: gene, value: set of terms
+# param: gene_set - the set of all distinct genes
+# param: min_support - the minimum support
+# param: workers - the number of processes the candidates are evaluated in
+# param: left_terms - if given, only itemsets across left_terms and right_terms are mined
+# param: right_terms - the terms that can be on the right side of an association, if left_terms is given
+# param: all_parents - if given, itemsets with a term and one of its ancestors are not mined
+# return: frequent_itemset_table - the frequent itemsets of every size
+def eclat(gene_terms, gene_set, min_support, min_weighted_support, min_information_content,
+          all_spec, all_ic, workers=1, left_terms=None, right_terms=None, all_parents=None):
+    frequent_itemset_table = generate_all_frequent_itemsets(gene_terms, gene_set, min_support, min_weighted_support,
+                                                            min_information_content, all_spec, all_ic, workers,
+                                                            left_terms, right_terms, all_parents)
+    return frequent_itemset_table
@@ -12,10 +12,19 @@ support 4% - 10%, coverage 4% - 10%, and confidence 20% - 50%.
 from ontology_parsing import hpo_parsing_onto, parsing_go, testing_ontology_parsing
 from annotation_parsing import hpo_parsing_ann, parsing_ann, testing_annotation_parsing
 from tree_modification import gene_to_all_parents, join_gt, calculate_ic, terms_to_all_parents, \
-    all_specificity, swap_key_value, join_two
-from apriori_algorithm import apriori
-from association_creation import create_associations
+    all_specificity, swap_key_value, join_two, update_all_parents, update_gene_to_all_parents, update_ic, \
+    update_specificity
+from apriori_algorithm import apriori, scale_thresholds, itemset_supports, filter_frequent_itemsets, \
+    create_vertical_index
+from eclat_algorithm import eclat
+from disk_apriori_algorithm import disk_apriori, default_memory_cap
+from association_creation import iter_associations, score_associations, select_associations, top_associations, \
+    collapse_implied_associations
+from artefact_cache import read_cache, write_cache
+from parsing_utils import Interner
 from math import ceil
+from sys import intern
+import os
 import sys
 
 # Directories
@@ -44,6 +53,15 @@ gene_term_bp_filename = created_direct + "gene_term_bp.txt"
 gene_term_mf_filename = created_direct + "gene_term_mf.txt"
 gene_term_hp_filename = created_direct + "gene_term_hp.txt"
 
+# Binary cache of all of the above, and the files it is made from
+onto_ann_cache_filename = created_direct + "onto_ann.cache"
+onto_ann_filenames = [gene_term_filename, gene_term_bp_filename, gene_term_mf_filename, gene_term_hp_filename,
+                      hp_spec_filename, bp_spec_filename, mf_spec_filename, hp_ic_filename, bp_ic_filename,
+                      mf_ic_filename]
+
+# Everything create_onto_ann worked out for each ontology, so the next release can be updated from it
+release_snapshot_filename = created_direct + "release_snapshot.cache"
+
 # Ontology Given
 hp_ontology_filename = input_direct + "hp.obo.txt"
 g_ontology_filename = input_direct + "go.obo"
@@ -52,19 +70,26 @@ g_ontology_filename = input_direct + "go.obo"
 hp_annotations_filename = input_direct + "hpo_genes_to_phenotype.txt"
 g_annotations_filename = input_direct + "goa_human.gaf"
 
+# Frequent itemset mining algorithms, by the name general_main is given. disk_apriori keeps its levels on disk, for
+# trees like "all" whose candidates do not fit in memory.
+mining_algorithms = {"apriori": apriori, "eclat": eclat, "disk_apriori": disk_apriori}
+
 
 # Creates ontology and writes it to an output file, as well as calculates information content.
 #
 # param: gene_term_output_filename - the file the ontology is written to
 # return: all_gt - dictionary; key: gene, value: set of terms
 def create_onto_ann():
+    # Terms are worked on as integer codes and only turned back into ids to be written out.
+    terms = Interner()
+
     # Read in ontologies. terms to parents
-    hpo_terms_parents = hpo_parsing_onto(hp_ontology_filename)
-    bp_terms_parents, mf_terms_parents, cc_terms_parents = parsing_go(g_ontology_filename)
+    hpo_terms_parents = hpo_parsing_onto(hp_ontology_filename, terms)
+    bp_terms_parents, mf_terms_parents, cc_terms_parents = parsing_go(g_ontology_filename, terms)
 
     # Read in annotations.
-    hp_gt = hpo_parsing_ann(hp_annotations_filename)
-    gene_syn, bp_gt, mf_gt, cc_gt = parsing_ann(g_annotations_filename)
+    hp_gt = hpo_parsing_ann(hp_annotations_filename, terms)
+    gene_syn, bp_gt, mf_gt, cc_gt = parsing_ann(g_annotations_filename, terms)
 
     # Creates transitive trees
     hpo_terms_parents_trans = terms_to_all_parents(hpo_terms_parents)
@@ -91,11 +116,24 @@ def create_onto_ann():
     bp_spec = all_specificity(bp_terms_parents_trans, bp_ic)
     mf_spec = all_specificity(mf_terms_parents_trans, mf_ic)
 
+    snapshot = {
+        "hp": ontology_snapshot(terms, hpo_terms_parents, hp_gt, hpo_terms_parents_trans, hp_tg, hp_ic, hp_spec),
+        "bp": ontology_snapshot(terms, bp_terms_parents, bp_gt, bp_terms_parents_trans, bp_tg, bp_ic, bp_spec),
+        "mf": ontology_snapshot(terms, mf_terms_parents, mf_gt, mf_terms_parents_trans, mf_tg, mf_ic, mf_spec)}
+
     # Join all term to gene and make them gene to term.
-    all_gt = join_gt(hp_tg, bp_tg, mf_tg)
-    hp_gt = swap_key_value(hp_tg)
-    bp_gt = swap_key_value(bp_tg)
-    mf_gt = swap_key_value(mf_tg)
+    all_gt = terms.decode_values(join_gt(hp_tg, bp_tg, mf_tg))
+    hp_gt = terms.decode_values(swap_key_value(hp_tg))
+    bp_gt = terms.decode_values(swap_key_value(bp_tg))
+    mf_gt = terms.decode_values(swap_key_value(mf_tg))
+
+    hp_spec = terms.decode_keys(hp_spec)
+    bp_spec = terms.decode_keys(bp_spec)
+    mf_spec = terms.decode_keys(mf_spec)
+
+    hp_ic = terms.decode_keys(hp_ic)
+    bp_ic = terms.decode_keys(bp_ic)
+    mf_ic = terms.decode_keys(mf_ic)
 
     output_file = open(gene_term_filename, "w")
     for gene in all_gt:
@@ -181,109 +219,170 @@ def create_onto_ann():
     for term in mf_spec:
         all_spec[term] = mf_spec[term]
 
+    write_cache(onto_ann_cache_filename, onto_ann_filenames, (all_gt, all_spec, all_ic, bp_gt, mf_gt, hp_gt))
+    write_cache(release_snapshot_filename, onto_ann_filenames, snapshot)
+
     return all_gt, all_spec, all_ic, bp_gt, mf_gt, hp_gt
 
 
-def read_onto_ann():
-    file = open(gene_term_filename, "r")
-    gt = {}
-    for line in file:
-        cols = line.split("\t")
-        cols[len(cols) - 1] = cols[len(cols) - 1][0:-1]
+# Gathers everything worked out for one ontology, with the codes of an Interner turned back into ids, so the next
+# release can be updated from it.
+#
+# param: terms - the Interner the terms are coded with
+# param: tree - dictionary; key: term, value: parents
+# param: gene_terms - dictionary; key: gene, value: terms it is annotated to
+# param: all_parents - dictionary; key: term, value: all parents (transitively)
+# param: terms_to_genes - dictionary; key: term, value: genes annotated to it or below it
+# param: term_ic - dictionary; key: term, value: information content
+# param: term_spec - dictionary; key: term, value: specificity
+# return: dictionary of the above, and the number of terms and parents in the tree
+def ontology_snapshot(terms, tree, gene_terms, all_parents, terms_to_genes, term_ic, term_spec):
+    return {"tree": terms.decode_values(terms.decode_keys(tree)),
+            "gene_terms": terms.decode_values(gene_terms),
+            "all_parents": terms.decode_values(terms.decode_keys(all_parents)),
+            "terms_to_genes": terms.decode_keys(terms_to_genes),
+            "ic": terms.decode_keys(term_ic),
+            "spec": terms.decode_keys(term_spec),
+            "node_count": len(set(all_parents.keys()).union(*all_parents.values()))}
+
+
+# Updates the ontology and annotation files for a new release of the inputs, from the snapshot create_onto_ann (or
+# the last update) left. Only the terms whose parents or annotations changed, and the terms above and below them, are
+# worked out again, and only the lines of the files for the genes and terms that changed are rewritten. The
+# information content of every term depends on the number of genes with any term, and the specificity on the number
+# of terms, so if either changed (as it does in most releases of the annotations) every information content or
+# specificity line is worked out and written again. If there is no snapshot, or the files were changed or removed
+# since it was written, everything is created again.
+#
+# return: the same as create_onto_ann
+def update_onto_ann():
+    snapshot = read_cache(release_snapshot_filename, onto_ann_filenames)
+    if snapshot is None:
+        return create_onto_ann()
 
-        gt[cols[0]] = set()
-        for i in range(1, len(cols)):
-            gt[cols[0]].add(cols[i])
-    file.close()
+    # Read in ontologies and annotations, with the terms as ids, like the snapshot.
+    trees = {"hp": hpo_parsing_onto(hp_ontology_filename)}
+    trees["bp"], trees["mf"], cc_terms_parents = parsing_go(g_ontology_filename)
 
-    file = open(gene_term_bp_filename, "r")
-    bp_gt = {}
-    for line in file:
-        cols = line.split("\t")
-        cols[len(cols) - 1] = cols[len(cols) - 1][0:-1]
+    gene_terms = {"hp": hpo_parsing_ann(hp_annotations_filename)}
+    gene_syn, gene_terms["bp"], gene_terms["mf"], cc_gt = parsing_ann(g_annotations_filename)
 
-        bp_gt[cols[0]] = set()
-        for i in range(1, len(cols)):
-            bp_gt[cols[0]].add(cols[i])
-    file.close()
+    gene_term_filenames = {"hp": gene_term_hp_filename, "bp": gene_term_bp_filename, "mf": gene_term_mf_filename}
+    ic_filenames = {"hp": hp_ic_filename, "bp": bp_ic_filename, "mf": mf_ic_filename}
+    spec_filenames = {"hp": hp_spec_filename, "bp": bp_spec_filename, "mf": mf_spec_filename}
 
-    file = open(gene_term_mf_filename, "r")
-    mf_gt = {}
-    for line in file:
-        cols = line.split("\t")
-        cols[len(cols) - 1] = cols[len(cols) - 1][0:-1]
-
-        mf_gt[cols[0]] = set()
-        for i in range(1, len(cols)):
-            mf_gt[cols[0]].add(cols[i])
-    file.close()
+    gts = {}
+    all_ic = {}
+    all_spec = {}
+    changed_genes = set()
+    for onto in ["hp", "bp", "mf"]:
+        old = snapshot[onto]
+
+        all_parents, changed_parents = update_all_parents(trees[onto], old["tree"], old["all_parents"])
+        tg, changed_tg = update_gene_to_all_parents(trees[onto], gene_terms[onto], all_parents, old["tree"],
+                                                    old["gene_terms"], old["all_parents"], old["terms_to_genes"])
+        term_ic, changed_ic = update_ic(tg, old["terms_to_genes"], old["ic"], changed_tg)
+        term_spec, changed_spec = update_specificity(all_parents, term_ic, old["spec"], old["node_count"],
+                                                     changed_parents, changed_ic)
+
+        gts[onto] = swap_key_value(tg)
+        all_ic.update(term_ic)
+        all_spec.update(term_spec)
+
+        # The genes whose line changes are the genes of every term whose genes changed, before or after
+        onto_changed_genes = set()
+        for term in changed_tg:
+            onto_changed_genes.update(old["terms_to_genes"].get(term, ()))
+            onto_changed_genes.update(tg.get(term, ()))
+        changed_genes.update(onto_changed_genes)
+
+        update_rows(gene_term_filenames[onto], gts[onto], onto_changed_genes)
+        update_rows(ic_filenames[onto], term_values_rows(term_ic), changed_ic)
+        update_rows(spec_filenames[onto], term_values_rows(term_spec), changed_spec)
+
+        snapshot[onto] = {"tree": trees[onto], "gene_terms": gene_terms[onto], "all_parents": all_parents,
+                          "terms_to_genes": tg, "ic": term_ic, "spec": term_spec,
+                          "node_count": len(set(all_parents.keys()).union(*all_parents.values()))}
+
+    all_gt = {}
+    for onto in ["hp", "bp", "mf"]:
+        for gene in gts[onto]:
+            if gene not in all_gt:
+                all_gt[gene] = set()
+            all_gt[gene].update(gts[onto][gene])
+    update_rows(gene_term_filename, all_gt, changed_genes)
+
+    write_cache(release_snapshot_filename, onto_ann_filenames, snapshot)
+    write_cache(onto_ann_cache_filename, onto_ann_filenames, (all_gt, all_spec, all_ic, gts["bp"], gts["mf"],
+                                                              gts["hp"]))
+
+    return all_gt, all_spec, all_ic, gts["bp"], gts["mf"], gts["hp"]
+
+
+# Turns a term to value dictionary into the rows of a term to value file.
+#
+# param: term_values - dictionary; key: term, value: float value
+# return: dictionary; key: term, value: list with the value as it is written
+def term_values_rows(term_values):
+    rows = {}
+    for term in term_values:
+        rows[term] = [str(term_values[term])]
 
-    file = open(gene_term_hp_filename, "r")
-    hp_gt = {}
-    for line in file:
-        cols = line.split("\t")
-        cols[len(cols) - 1] = cols[len(cols) - 1][0:-1]
+    return rows
 
-        hp_gt[cols[0]] = set()
-        for i in range(1, len(cols)):
-            hp_gt[cols[0]].add(cols[i])
-    file.close()
 
-    # Read Specificity Files
-    file = open(hp_spec_filename, "r")
-    hp_spec = {}
-    for line in file:
-        cols = line.split("\t")
-        cols[len(cols) - 1] = cols[len(cols) - 1][0:-1]
+# Rewrites the lines of a tab separated file for some keys and leaves the rest as they are. Lines are replaced where
+# they are, keys that are new are added at the end and keys that are gone are left out.
+#
+# param: filename - the file, one key per line followed by its values
+# param: rows - dictionary; key: the first column, value: the other columns
+# param: changed - the keys whose lines are rewritten
+def update_rows(filename, rows, changed):
+    if len(changed) == 0:
+        return
+
+    temp_filename = filename + ".tmp"
+    input_file = open(filename, "r")
+    output_file = open(temp_filename, "w")
+    written = set()
+    for line in input_file:
+        key = line[0:-1].split("\t", 1)[0]
+        if key not in changed:
+            output_file.write(line)
+        elif key in rows:
+            output_file.write("\t".join([key] + list(rows[key])) + "\n")
+            written.add(key)
+    for key in changed:
+        if key not in written and key in rows:
+            output_file.write("\t".join([key] + list(rows[key])) + "\n")
+    input_file.close()
+    output_file.close()
+    os.replace(temp_filename, filename)
 
-        hp_spec[cols[0]] = float(cols[1])
-    file.close()
 
-    file = open(bp_spec_filename, "r")
-    bp_spec = {}
-    for line in file:
-        cols = line.split("\t")
-        cols[len(cols) - 1] = cols[len(cols) - 1][0:-1]
-
-        bp_spec[cols[0]] = float(cols[1])
-    file.close()
+# Reads the ontology and annotation files made by create_onto_ann. The binary cache is used instead if none of the
+# files changed since it was written.
+#
+# return: the same as create_onto_ann
+def read_onto_ann():
+    onto_ann = read_cache(onto_ann_cache_filename, onto_ann_filenames)
+    if onto_ann is not None:
+        return onto_ann
 
-    file = open(mf_spec_filename, "r")
-    mf_spec = {}
-    for line in file:
-        cols = line.split("\t")
-        cols[len(cols) - 1] = cols[len(cols) - 1][0:-1]
+    gt = read_gene_terms(gene_term_filename)
+    bp_gt = read_gene_terms(gene_term_bp_filename)
+    mf_gt = read_gene_terms(gene_term_mf_filename)
+    hp_gt = read_gene_terms(gene_term_hp_filename)
 
-        mf_spec[cols[0]] = float(cols[1])
-    file.close()
+    # Read Specificity Files
+    hp_spec = read_term_values(hp_spec_filename)
+    bp_spec = read_term_values(bp_spec_filename)
+    mf_spec = read_term_values(mf_spec_filename)
 
     # Read Information Content Files
-    file = open(hp_ic_filename, "r")
-    hp_ic = {}
-    for line in file:
-        cols = line.split("\t")
-        cols[len(cols) - 1] = cols[len(cols) - 1][0:-1]
-
-        hp_ic[cols[0]] = float(cols[1])
-    file.close()
-
-    file = open(bp_ic_filename, "r")
-    bp_ic = {}
-    for line in file:
-        cols = line.split("\t")
-        cols[len(cols) - 1] = cols[len(cols) - 1][0:-1]
-
-        bp_ic[cols[0]] = float(cols[1])
-    file.close()
-
-    file = open(mf_ic_filename, "r")
-    mf_ic = {}
-    for line in file:
-        cols = line.split("\t")
-        cols[len(cols) - 1] = cols[len(cols) - 1][0:-1]
-
-        mf_ic[cols[0]] = float(cols[1])
-    file.close()
+    hp_ic = read_term_values(hp_ic_filename)
+    bp_ic = read_term_values(bp_ic_filename)
+    mf_ic = read_term_values(mf_ic_filename)
 
     all_ic = {}
     for term in hp_ic:
@@ -301,12 +400,71 @@ def read_onto_ann():
     for term in mf_spec:
         all_spec[term] = mf_spec[term]
 
+    write_cache(onto_ann_cache_filename, onto_ann_filenames, (gt, all_spec, all_ic, bp_gt, mf_gt, hp_gt))
+
     return gt, all_spec, all_ic, bp_gt, mf_gt, hp_gt
 
 
-# Create frequent itemsets.
+# Reads the ancestors of every term of the three ontologies: from the snapshot create_onto_ann (or the last update)
+# left, if none of the files changed since it was written, or else from the ontologies.
+#
+# return: dictionary; key: term, value: all of its ancestors (transitively)
+def read_all_parents():
+    all_parents = {}
+    snapshot = read_cache(release_snapshot_filename, onto_ann_filenames)
+    if snapshot is not None:
+        for onto in snapshot:
+            all_parents.update(snapshot[onto]["all_parents"])
+        return all_parents
+
+    terms = Interner()
+    hpo_terms_parents = hpo_parsing_onto(hp_ontology_filename, terms)
+    bp_terms_parents, mf_terms_parents, cc_terms_parents = parsing_go(g_ontology_filename, terms)
+    for terms_parents in [hpo_terms_parents, bp_terms_parents, mf_terms_parents]:
+        all_parents.update(terms.decode_values(terms.decode_keys(terms_to_all_parents(terms_parents))))
+
+    return all_parents
+
+
+# Reads a gene to terms file. Every gene and term is interned, so each is only held (and cached) once.
+#
+# param: filename - the file, one gene per line followed by its terms, tab separated
+# return: dictionary; key: gene, value: set of terms
+def read_gene_terms(filename):
+    file = open(filename, "r")
+    gt = {}
+    for line in file:
+        cols = line.split("\t")
+        cols[len(cols) - 1] = cols[len(cols) - 1][0:-1]
+
+        gt[intern(cols[0])] = set(map(intern, cols[1:]))
+    file.close()
+
+    return gt
+
+
+# Reads a term to value file, for specificity or information content.
+#
+# param: filename - the file, one term and its value per line, tab separated
+# return: dictionary; key: term, value: float value
+def read_term_values(filename):
+    file = open(filename, "r")
+    term_values = {}
+    for line in file:
+        cols = line.split("\t")
+        cols[len(cols) - 1] = cols[len(cols) - 1][0:-1]
+
+        term_values[intern(cols[0])] = float(cols[1])
+    file.close()
+
+    return term_values
+
+
+# Create frequent itemsets. If possible_right is given, only itemsets across possible_left and possible_right are mined;
+# if all_parents is given, itemsets with a term and one of its ancestors are not mined.
 def create_freq_itemsets(filename, possible_left, all_gt, min_support, min_weighted_support,
-                         min_information_content, all_spec, all_ic):
+                         min_information_content, all_spec, all_ic, algorithm="apriori", workers=1,
+                         possible_right=None, all_parents=None, memory_cap=default_memory_cap):
     all_terms = set()
     for gene in all_gt:
         for term in all_gt[gene]:
@@ -315,25 +473,68 @@ def create_freq_itemsets(filename, possible_left, all_gt, min_support, min_weigh
     print("ALL GT: ", end="")
     print(all_gt)
 
-    freq_itemsets = apriori(all_gt, all_terms, min_support, min_weighted_support,
-                            min_information_content, all_spec, all_ic)
+    left_terms = None
+    if possible_right is not None:
+        left_terms = possible_left
+    if algorithm == "disk_apriori":
+        freq_itemsets = disk_apriori(all_gt, all_terms, min_support, min_weighted_support, min_information_content,
+                                     all_spec, all_ic, workers, left_terms, possible_right, all_parents, memory_cap)
+
+        # The levels stay on disk, and are read again each time the frequent itemsets are gone through
+        freq_itemsets = LeftFreqItemsets(freq_itemsets, possible_left)
+    else:
+        freq_itemsets = mining_algorithms[algorithm](all_gt, all_terms, min_support, min_weighted_support,
+                                                     min_information_content, all_spec, all_ic, workers, left_terms,
+                                                     possible_right, all_parents)
+
+        freq_itemsets = left_freq_itemsets(freq_itemsets, possible_left)
+    write_freq_itemsets(filename, freq_itemsets, min_support, min_weighted_support, min_information_content)
+
+    return freq_itemsets
 
-    all_itemsets = []
+
+# Flattens the table of frequent itemsets and keeps the itemsets that have an item that can be on the left side of an
+# association.
+#
+# param: freq_itemsets - the table of frequent itemsets; key: size, value: itemsets
+# param: possible_left - the terms that can be on the left side of an association
+# return: list of frequent itemsets
+def left_freq_itemsets(freq_itemsets, possible_left):
+    return list(iter_left_freq_itemsets(freq_itemsets, possible_left))
+
+
+# Goes through the table of frequent itemsets and finds the itemsets that have an item that can be on the left side of
+# an association, without keeping them.
+#
+# param: freq_itemsets - the table of frequent itemsets; key: size, value: itemsets
+# param: possible_left - the terms that can be on the left side of an association
+# return: generator of frequent itemsets
+def iter_left_freq_itemsets(freq_itemsets, possible_left):
     for size_freq in freq_itemsets:
         for itemset in freq_itemsets[size_freq]:
-            all_itemsets.append(itemset)
+            found = False
+            for item in range(0, len(itemset)):
+                if itemset[item] in possible_left:
+                    found = True
 
-    freq_itemsets = all_itemsets
+            if found:
+                yield itemset
 
-    for itemset in freq_itemsets:
-        found = False
-        for item in range(0, len(itemset)):
-            if itemset[item] in possible_left:
-                found = True
 
-        if not found:
-            freq_itemsets.remove(itemset)
+# The frequent itemsets left_freq_itemsets would give for a table whose levels are kept on disk. They are not copied
+# into a list, but found again from the table each time they are iterated.
+class LeftFreqItemsets:
 
+    def __init__(self, freq_itemsets, possible_left):
+        self.freq_itemsets = freq_itemsets
+        self.possible_left = possible_left
+
+    def __iter__(self):
+        return iter_left_freq_itemsets(self.freq_itemsets, self.possible_left)
+
+
+# Write frequent itemsets.
+def write_freq_itemsets(filename, freq_itemsets, min_support, min_weighted_support, min_information_content):
     file = open(filename, "w")
     file.write("Min Support - "+str(min_support)+"\n")
     file.write("Min Information Content - " + str(min_information_content) + "\n")
@@ -346,8 +547,6 @@ def create_freq_itemsets(filename, possible_left, all_gt, min_support, min_weigh
         file.write("\n")
     file.close()
 
-    return freq_itemsets
-
 
 # Read frequent itemsets.
 def read_freq_itemsets(filename):
@@ -370,10 +569,19 @@ def read_freq_itemsets(filename):
     return freq_itemsets
 
 
+# Creates the associations and writes them as they are found, so they are not all held in memory. If all_parents is
+# given, the associations implied by a more specific one are left out, which needs all of them first.
 def create_new_associations(left_terms, right_terms, all_gt, freq_itemsets, min_confidence, min_coverage,
-                            filename, all_spec):
-    final_associations = create_associations(left_terms, right_terms, all_gt, freq_itemsets, min_confidence,
-                                             min_coverage, all_spec)
+                            filename, all_spec, all_parents=None):
+    final_associations = iter_associations(left_terms, right_terms, all_gt, freq_itemsets, min_confidence,
+                                           min_coverage, all_spec)
+    if all_parents is not None:
+        final_associations = collapse_implied_associations(list(final_associations), all_parents)
+    write_associations(filename, final_associations, min_confidence, min_coverage)
+
+
+# Write associations.
+def write_associations(filename, final_associations, min_confidence, min_coverage):
     file = open(filename, "w")
 
     file.write("Min Coverage - " + str(min_coverage) + "\n")
@@ -387,14 +595,26 @@ def create_new_associations(left_terms, right_terms, all_gt, freq_itemsets, min_
         file.write("\n")
     file.close()
 
-    return final_associations
 
+# Write the top associations, each followed by its score.
+def write_top_associations(filename, top, top_k):
+    file = open(filename, "w")
 
-def general_main(freq_file_ext, association_file_ext, recreate_onto_ann, recreate_freq_itemsets, tree,
-                 min_support, min_weighted_support, min_confidence, min_information_content, min_coverage):
+    file.write("Top Associations - " + str(top_k) + "\n")
 
-    freq_itemsets_filename = created_direct + "freq_itemsets_" + str(freq_file_ext) + ".txt"
-    associations_filename = created_direct + "associations_" + str(association_file_ext) + ".txt"
+    for association, score in top:
+        for associate in range(0, len(association)):
+            file.write(association[associate])
+            file.write("\t")
+        file.write(str(score))
+        file.write("\n")
+    file.close()
+
+
+# Prints the parameters of a run and adds them to the information file.
+def write_run_info(freq_itemsets_filename, associations_filename, tree, min_support, min_weighted_support,
+                   min_confidence, min_information_content, min_coverage, algorithm, top_k=0,
+                   prune_lineage="false", collapse_implied="false", memory_cap=None):
     information_filename = "info_on_files.txt"
 
     info_file = open(information_filename, "a+")
@@ -407,6 +627,15 @@ def general_main(freq_file_ext, association_file_ext, recreate_onto_ann, recreat
     print("Minimum confidence: "+str(min_confidence))
     print("Minimum information content: "+str(min_information_content))
     print("Minimum coverage: "+str(min_coverage))
+    print("Mining algorithm: "+str(algorithm))
+    if memory_cap is not None:
+        print("Memory cap: "+str(memory_cap))
+    if top_k > 0:
+        print("Top associations: "+str(top_k))
+    if prune_lineage == "true":
+        print("Lineage pruning: true")
+    if collapse_implied == "true":
+        print("Implied associations collapsed: true")
 
     info_file.write("Frequent itemsets filename: " + str(freq_itemsets_filename) + "\n")
     info_file.write("Associations filename: " + str(associations_filename) + "\n")
@@ -416,51 +645,184 @@ def general_main(freq_file_ext, association_file_ext, recreate_onto_ann, recreat
     info_file.write("Minimum confidence: " + str(min_confidence) + "\n")
     info_file.write("Minimum information content: " + str(min_information_content) + "\n")
     info_file.write("Minimum coverage: " + str(min_coverage) + "\n")
+    info_file.write("Mining algorithm: " + str(algorithm) + "\n")
+    if memory_cap is not None:
+        info_file.write("Memory cap: " + str(memory_cap) + "\n")
+    if top_k > 0:
+        info_file.write("Top associations: " + str(top_k) + "\n")
+    if prune_lineage == "true":
+        info_file.write("Lineage pruning: true\n")
+    if collapse_implied == "true":
+        info_file.write("Implied associations collapsed: true\n")
     info_file.write("\n\n")
 
     info_file.close()
 
-    if recreate_onto_ann == "true":
-        all_gt, all_spec, all_ic, bp_gt, mf_gt, hp_gt = create_onto_ann()
-    else:
-        all_gt, all_spec, all_ic, bp_gt, mf_gt, hp_gt = read_onto_ann()
 
+# Finds the terms that can be on each side of an association for a tree.
+#
+# param: tree - 'bp', 'mf', 'hp' or 'all'
+# return: possible_left - the terms that can be on the left side of an association
+# return: possible_right - the terms that can be on the right side of an association
+def tree_sides(tree, all_gt, bp_gt, mf_gt, hp_gt):
     possible_left = set()
     possible_right = set()
     if tree == 'bp':
         for gene in bp_gt:
-            possible_left = bp_gt[gene].union(possible_left)
+            possible_left.update(bp_gt[gene])
         for gene in hp_gt:
-            possible_right = hp_gt[gene].union(possible_right)
+            possible_right.update(hp_gt[gene])
     elif tree == 'mf':
         for gene in mf_gt:
-            possible_left = mf_gt[gene].union(possible_left)
+            possible_left.update(mf_gt[gene])
         for gene in hp_gt:
-            possible_right = hp_gt[gene].union(possible_right)
+            possible_right.update(hp_gt[gene])
     elif tree == 'hp':
         for gene in hp_gt:
-            possible_left = hp_gt[gene].union(possible_left)
+            possible_left.update(hp_gt[gene])
         possible_right = possible_left
     else:
         for gene in all_gt:
-            possible_left = all_gt[gene].union(possible_left)
+            possible_left.update(all_gt[gene])
         possible_right = possible_left
 
+    return possible_left, possible_right
+
+
+# Finds the gene to terms transactions the frequent itemsets of a tree are mined from.
+#
+# param: tree - 'bp', 'mf', 'hp' or 'all'
+# return: dictionary; key: gene, value: set of terms
+def tree_transactions(tree, all_gt, bp_gt, mf_gt, hp_gt):
+    if tree == 'bp':
+        return join_two(bp_gt, hp_gt)
+    elif tree == 'mf':
+        return join_two(mf_gt, hp_gt)
+    elif tree == 'hp':
+        return hp_gt
+    return all_gt
+
+
+def general_main(freq_file_ext, association_file_ext, recreate_onto_ann, recreate_freq_itemsets, tree,
+                 min_support, min_weighted_support, min_confidence, min_information_content, min_coverage,
+                 algorithm="apriori", workers=1, constrain_sides="false", top_k=0, prune_lineage="false",
+                 collapse_implied="false", memory_cap=default_memory_cap):
+
+    freq_itemsets_filename = created_direct + "freq_itemsets_" + str(freq_file_ext) + ".txt"
+    associations_filename = created_direct + "associations_" + str(association_file_ext) + ".txt"
+
+    write_run_info(freq_itemsets_filename, associations_filename, tree, min_support, min_weighted_support,
+                   min_confidence, min_information_content, min_coverage, algorithm, top_k, prune_lineage,
+                   collapse_implied, memory_cap if algorithm == "disk_apriori" else None)
+
+    if recreate_onto_ann == "true":
+        all_gt, all_spec, all_ic, bp_gt, mf_gt, hp_gt = create_onto_ann()
+    elif recreate_onto_ann == "update":
+        all_gt, all_spec, all_ic, bp_gt, mf_gt, hp_gt = update_onto_ann()
+    else:
+        all_gt, all_spec, all_ic, bp_gt, mf_gt, hp_gt = read_onto_ann()
+
+    possible_left, possible_right = tree_sides(tree, all_gt, bp_gt, mf_gt, hp_gt)
+
+    # The ancestors of every term, to leave out itemsets and associations within one lineage
+    all_parents = None
+    if prune_lineage == "true" or collapse_implied == "true":
+        all_parents = read_all_parents()
+
     if recreate_freq_itemsets == "true":
-        if tree == 'bp':
-            all_gt = join_two(bp_gt, hp_gt)
-        elif tree == 'mf':
-            all_gt = join_two(mf_gt, hp_gt)
-        elif tree == 'hp':
-            all_gt = hp_gt
+        all_gt = tree_transactions(tree, all_gt, bp_gt, mf_gt, hp_gt)
+
+        # Only mine itemsets across the two sides of an association
+        mined_right = None
+        if constrain_sides == "true":
+            mined_right = possible_right
 
         freq_itemsets = create_freq_itemsets(freq_itemsets_filename, possible_left, all_gt,
                                              min_support, min_weighted_support, min_information_content,
-                                             all_spec, all_ic)
+                                             all_spec, all_ic, algorithm, workers, mined_right,
+                                             all_parents if prune_lineage == "true" else None, memory_cap)
     else:
         freq_itemsets = read_freq_itemsets(freq_itemsets_filename)
 
-    create_new_associations(possible_left, possible_right, all_gt, freq_itemsets, min_confidence,
-                            min_coverage, associations_filename, all_spec)
+    if top_k > 0:
+        # The best top_k associations instead of the ones over min_confidence and min_coverage
+        top = top_associations(possible_left, possible_right, all_gt, freq_itemsets, top_k, all_spec)
+        write_top_associations(associations_filename, top, top_k)
+    else:
+        create_new_associations(possible_left, possible_right, all_gt, freq_itemsets, min_confidence,
+                                min_coverage, associations_filename, all_spec,
+                                all_parents if collapse_implied == "true" else None)
+
+    print("Done")
+
+
+# Runs general_main for every combination of the given trees, supports and confidences, numbering the files the same
+# way. Each tree is mined once at the lowest support, and the support, weighted support, confidence and coverage of
+# every itemset and association are kept, so each combination only filters those values.
+#
+# param: trees - list of trees ('bp', 'mf', 'hp' or 'all')
+# param: supports - list of minimum supports
+# param: confidences - list of minimum confidences
+# param: recreate_onto_ann - "true" to recreate the ontology and annotation files first, "update" to update them for
+#  a new release of the inputs
+# param: workers - the number of processes the candidates are evaluated in
+# param: constrain_sides - "true" to only mine itemsets across the two sides of an association
+def sweep_main(trees, supports, min_weighted_support, confidences, min_information_content, min_coverage,
+               recreate_onto_ann="false", workers=1, constrain_sides="false"):
+    if recreate_onto_ann == "true":
+        all_gt, all_spec, all_ic, bp_gt, mf_gt, hp_gt = create_onto_ann()
+    elif recreate_onto_ann == "update":
+        all_gt, all_spec, all_ic, bp_gt, mf_gt, hp_gt = update_onto_ann()
+    else:
+        all_gt, all_spec, all_ic, bp_gt, mf_gt, hp_gt = read_onto_ann()
+
+    count_freq_file = 1
+    count_assoc_file = 1
+
+    for tree in trees:
+        possible_left, possible_right = tree_sides(tree, all_gt, bp_gt, mf_gt, hp_gt)
+        transactions = tree_transactions(tree, all_gt, bp_gt, mf_gt, hp_gt)
+
+        all_terms = set()
+        for gene in transactions:
+            all_terms.update(transactions[gene])
+
+        left_terms = None
+        right_terms = None
+        if constrain_sides == "true":
+            left_terms = possible_left
+            right_terms = possible_right
+
+        # Mine once at the lowest support and keep the supports of what was found
+        table = apriori(transactions, all_terms, min(supports), min_weighted_support, min_information_content,
+                        all_spec, all_ic, workers, left_terms, right_terms)
+        item_supports, weighted_supports = itemset_supports(transactions, table, all_spec)
+        association_scores = {}
+        item_transactions = create_vertical_index(transactions)
+
+        for sup in supports:
+            freq_itemsets_filename = created_direct + "freq_itemsets_" + str(count_freq_file) + ".txt"
+            min_support_count, min_weighted, min_ic = scale_thresholds(transactions, all_terms, sup,
+                                                                       min_weighted_support,
+                                                                       min_information_content)
+            freq_itemsets = filter_frequent_itemsets(table, item_supports, weighted_supports, min_support_count,
+                                                     min_weighted)
+            freq_itemsets = left_freq_itemsets(freq_itemsets, possible_left)
+            write_freq_itemsets(freq_itemsets_filename, freq_itemsets, sup, min_weighted_support,
+                                min_information_content)
+
+            scored_associations = score_associations(transactions, freq_itemsets, all_spec, association_scores,
+                                                     item_transactions)
+
+            for conf in confidences:
+                associations_filename = created_direct + "associations_" + str(count_assoc_file) + ".txt"
+                write_run_info(freq_itemsets_filename, associations_filename, tree, sup, min_weighted_support,
+                               conf, min_information_content, min_coverage, "apriori")
+
+                final_associations = select_associations(possible_left, possible_right, scored_associations,
+                                                         conf, min_coverage)
+                write_associations(associations_filename, final_associations, conf, min_coverage)
+                count_assoc_file += 1
+            count_freq_file += 1
 
     print("Done")
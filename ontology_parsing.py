@@ -5,14 +5,20 @@ Author: Lily Wise
 This file parses ontologies for hpo files and for gene ontology files.
 """
 
+from sys import intern
+from parsing_utils import open_input
+
 
 # This function parses the hpo ontology file. It pulls the terms and
-# their parents to generate a tree.
+# their parents to generate a tree. The file is read one line at a time and
+# can be gzipped.
 #
 # param: filename - the file that holds the hpo ontology
+# param: interner - if given, terms are given as their codes in this Interner
 # return: terms_parents - a dictionary; key: id, value: array of terms (parents)
-def hpo_parsing_onto(filename):
-    file = open(filename, "r")
+def hpo_parsing_onto(filename, interner=None):
+    term_id_of = intern if interner is None else interner.code
+    file = open_input(filename)
     terms_parents = {}
     cur_key = ''
 
@@ -24,27 +30,32 @@ def hpo_parsing_onto(filename):
 
         # Find parents.
         elif line.startswith('is_a:'):
-            cur_parent = line[6:16]
+            cur_parent = term_id_of(line[6:16])
             if cur_parent not in terms_parents[cur_key]:
                 terms_parents[cur_parent] = set()
             terms_parents[cur_key].add(cur_parent)
 
         # Reads in the id number.
         elif line.startswith('id:'):
-            cur_key = line[4:14]
-            if cur_key not in terms_parents.keys():
+            cur_key = term_id_of(line[4:14])
+            if cur_key not in terms_parents:
                 terms_parents[cur_key] = set()
 
+    file.close()
+
     return terms_parents
 
 
 # This function parse the gene ontology file. It pulls the terms and their
-# parents. If is_obsolete is found then the term is not included.
+# parents. If is_obsolete is found then the term is not included. The file is
+# read one line at a time and can be gzipped.
 #
 # param: filename - the file that holds the gene ontology
+# param: interner - if given, terms are given as their codes in this Interner
 # return: terms_parents - a dictionary; key: id, value: array of terms (parents)
-def parsing_go(filename):
-    file = open(filename, "r")
+def parsing_go(filename, interner=None):
+    term_id_of = intern if interner is None else interner.code
+    file = open_input(filename)
     bp_terms_parents = {}
     mf_terms_parents = {}
     cc_terms_parents = {}
@@ -58,41 +69,43 @@ def parsing_go(filename):
         # Identifies that a new term is starting.
         if 'Term' in line:
             if not is_obsolete:
-                if namespace is 'b':
+                if namespace == 'b':
                     bp_terms_parents[cur_key] = cur_parents
-                elif namespace is 'm':
+                elif namespace == 'm':
                     mf_terms_parents[cur_key] = cur_parents
-                elif namespace is 'c':
+                elif namespace == 'c':
                     cc_terms_parents[cur_key] = cur_parents
             cur_parents = set()
             cur_key = ''
             is_obsolete = False
         # Reads in the id.
         elif line.startswith('id:'):
-            cur_key = line[4:14]
+            cur_key = term_id_of(line[4:14])
         # Removes the id if the is_obsolete is found.
         elif 'is_obsolete' in line:
             is_obsolete = True
-            if cur_key is not '':
-                if namespace is 'b' and cur_key in bp_terms_parents:
+            if cur_key != '':
+                if namespace == 'b' and cur_key in bp_terms_parents:
                     bp_terms_parents.pop(cur_key)
-                elif namespace is 'm' and cur_key in mf_terms_parents:
+                elif namespace == 'm' and cur_key in mf_terms_parents:
                     mf_terms_parents.pop(cur_key)
-                elif namespace is 'c' and cur_key in cc_terms_parents:
+                elif namespace == 'c' and cur_key in cc_terms_parents:
                     cc_terms_parents.pop(cur_key)
         # If it isn't obsolete then the parents can be added if found.
         elif line.startswith('is_a:') and not is_obsolete:
-            cur_parents.add(line[6:16])
+            cur_parents.add(term_id_of(line[6:16]))
         # Checks which namespace it is in.
         elif line.startswith('namespace:'):
             namespace = line[11]
-            if namespace is 'b' and cur_key not in bp_terms_parents:
+            if namespace == 'b' and cur_key not in bp_terms_parents:
                 bp_terms_parents[cur_key] = set()
-            elif namespace is 'm' and cur_key not in mf_terms_parents:
+            elif namespace == 'm' and cur_key not in mf_terms_parents:
                 mf_terms_parents[cur_key] = set()
-            elif namespace is 'c' and cur_key not in cc_terms_parents:
+            elif namespace == 'c' and cur_key not in cc_terms_parents:
                 cc_terms_parents[cur_key] = set()
 
+    file.close()
+
     return bp_terms_parents, mf_terms_parents, cc_terms_parents
 
 
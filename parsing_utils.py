@@ -0,0 +1,78 @@
+"""
+File: parsing_utils.py
+Author: Lily Wise
+
+Helpers shared by the ontology and annotation parsers.
+"""
+
+import gzip
+
+
+# Opens an input file for reading text, decompressing it as it is read if it ends in .gz.
+#
+# param: filename - the file to open
+# return: the open file
+def open_input(filename):
+    if filename.endswith(".gz"):
+        return gzip.open(filename, "rt")
+    return open(filename, "r")
+
+
+# Gives every distinct id a dense integer code, in the order the ids are first seen, so ids can be held as small
+# integers (and used as indices) instead of strings.
+class Interner:
+
+    def __init__(self):
+        self.codes = {}
+        self.names = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.codes
+
+    # Finds the code of an id, giving it the next code if it has none yet.
+    #
+    # param: name - the id
+    # return: the code of the id
+    def code(self, name):
+        code = self.codes.get(name)
+        if code is None:
+            code = len(self.names)
+            self.codes[name] = code
+            self.names.append(name)
+
+        return code
+
+    # Finds the id of a code. Anything that is not a code, such as the empty id of a stanza without an id line, is
+    # given back as it is.
+    #
+    # param: code - the code
+    # return: the id
+    def name(self, code):
+        if isinstance(code, int):
+            return self.names[code]
+        return code
+
+    # Swaps the codes for ids in the keys of a dictionary.
+    #
+    # param: coded - dictionary; key: code, value: anything
+    # return: dictionary; key: id, value: the same value
+    def decode_keys(self, coded):
+        decoded = {}
+        for code in coded:
+            decoded[self.name(code)] = coded[code]
+
+        return decoded
+
+    # Swaps the codes for ids in the values of a dictionary of sets.
+    #
+    # param: coded - dictionary; key: anything, value: set of codes
+    # return: dictionary; key: the same key, value: set of ids
+    def decode_values(self, coded):
+        decoded = {}
+        for key in coded:
+            decoded[key] = set(map(self.name, coded[key]))
+
+        return decoded
@@ -0,0 +1,187 @@
+"""
+Filename: test_apriori_algorithm.py
+Author: Lily Wise
+
+Checks the frequent itemset mining on the fixture in test_files/ and on small random transactions.
+"""
+
+from itertools import combinations
+import random
+import os
+import ontology_parsing
+import annotation_parsing
+from tree_modification import gene_to_all_parents, swap_key_value
+from apriori_algorithm import create_vertical_index, vertical_support, vertical_weighted_support, \
+    weight_support_count, apriori, scale_thresholds, itemset_supports, filter_frequent_itemsets, shares_lineage
+from eclat_algorithm import eclat
+from disk_apriori_algorithm import disk_apriori
+
+test_direct = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_files")
+
+
+# The genes of the fixture, each with its terms and all of their ancestors.
+def fixture_transactions():
+    tree = ontology_parsing.testing_ontology_parsing(os.path.join(test_direct, "ontology.txt"))
+    gene_terms = annotation_parsing.testing_annotation_parsing(os.path.join(test_direct, "annotations.txt"))
+
+    return swap_key_value(gene_to_all_parents(tree, gene_terms))
+
+
+# Random transactions, specificities and information contents, the same for the same seed.
+def random_transactions(seed, genes=40, terms=20):
+    generator = random.Random(seed)
+    names = ["T" + str(term) for term in range(0, terms)]
+    transactions = {}
+    for gene in range(0, genes):
+        transactions["G" + str(gene)] = set(generator.sample(names, generator.randint(1, 8)))
+    all_spec = {name: generator.uniform(0.01, 0.1) for name in names}
+    all_ic = {name: generator.uniform(0, 2) for name in names}
+
+    return transactions, set().union(*transactions.values()), all_spec, all_ic
+
+
+# Counts the transactions that have every item of an itemset, one transaction at a time.
+def scanned_support(transactions, itemset):
+    return sum(1 for trans in transactions if set(itemset) <= transactions[trans])
+
+
+def test_vertical_support():
+    item_transactions = create_vertical_index(fixture_transactions())
+
+    assert vertical_support(item_transactions, ("T0",)) == 4
+    assert vertical_support(item_transactions, ("T1", "T2")) == 2
+    assert vertical_support(item_transactions, ("T3", "T5")) == 1
+    assert vertical_support(item_transactions, ("T4", "T5")) == 0
+    assert vertical_support(item_transactions, ("T1", "T9")) == 0
+
+
+def test_vertical_weighted_support_matches_scan():
+    transactions, items, all_spec, all_ic = random_transactions(0)
+    item_transactions = create_vertical_index(transactions)
+
+    for itemset in combinations(sorted(items), 2):
+        assert vertical_weighted_support(item_transactions, itemset, all_spec) == \
+            weight_support_count(itemset, scanned_support(transactions, itemset), all_spec)
+
+
+def test_apriori_fixture():
+    transactions = fixture_transactions()
+    all_spec = {"T0": 0, "T1": 0.2, "T2": 0.2, "T3": 0.4, "T4": 0.6, "T5": 0.3}
+    all_ic = {"T0": 0, "T1": 1, "T2": 1, "T3": 1, "T4": 1, "T5": 1}
+
+    # At least 2 of the 4 genes, a weighted support of at least 0.5 / 2 and an information content over 0
+    table = apriori(transactions, set(all_spec), 0.5, 0.5, 0.0001, all_spec, all_ic)
+
+    assert table[1] == ["T1", "T2", "T3", "T5"]
+    # (T1, T5) is only in G1, with a weighted support of 2 * 0.2 * 0.3 / 0.5 = 0.24
+    assert table[2] == {("T1", "T2"), ("T1", "T3"), ("T2", "T3"), ("T2", "T5"), ("T3", "T5")}
+    # (T1, T2, T5) is only in G1, with a weighted support of 2 * 0.2 * 0.2 / 0.4 = 0.2
+    assert table[3] == {("T1", "T2", "T3"), ("T1", "T3", "T5"), ("T2", "T3", "T5")}
+    # (T1, T2, T3, T5) is pruned since (T1, T5) is not frequent
+    assert table[4] == set()
+
+
+def test_eclat_matches_apriori():
+    for seed in range(0, 3):
+        transactions, items, all_spec, all_ic = random_transactions(seed)
+
+        table = apriori(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic)
+        assert len(table) > 4
+        assert eclat(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic) == table
+        assert eclat(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic, 2) == table
+
+
+def test_filter_matches_mining_again():
+    transactions, items, all_spec, all_ic = random_transactions(1)
+    table = apriori(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic)
+    item_supports, weighted_supports = itemset_supports(transactions, table, all_spec)
+
+    for min_support in [0.1, 0.15, 0.2, 0.3]:
+        min_support_count, min_weighted_support, min_ic = scale_thresholds(transactions, items, min_support, 0.1,
+                                                                           0.1)
+        filtered = filter_frequent_itemsets(table, item_supports, weighted_supports, min_support_count,
+                                            min_weighted_support)
+        mined = apriori(transactions, items, min_support, 0.1, 0.1, all_spec, all_ic)
+
+        assert filtered.keys() == mined.keys()
+        for itemset_size in mined:
+            assert set(filtered[itemset_size]) == set(mined[itemset_size])
+
+
+def test_workers_match_serial():
+    transactions, items, all_spec, all_ic = random_transactions(2)
+
+    assert apriori(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic, 3) == \
+        apriori(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic)
+
+
+def test_constrained_mining():
+    transactions, items, all_spec, all_ic = random_transactions(0)
+    left_terms = set(["T" + str(term) for term in range(0, 8)])
+    right_terms = items - left_terms
+
+    table = apriori(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic)
+    constrained = apriori(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic, 1, left_terms, right_terms)
+
+    # The pairs are the pairs mined without the sides that go across them
+    assert constrained[1] == table[1]
+    assert constrained[2] == set(pair for pair in table[2] if (pair[0] in left_terms) != (pair[1] in left_terms))
+    # Larger itemsets are only counted on a pair across the sides too
+    assert len(constrained[3]) > 0
+    for itemset_size in range(3, len(constrained)):
+        assert constrained[itemset_size] <= table[itemset_size]
+        for itemset in constrained[itemset_size]:
+            assert (itemset[0] in left_terms) != (itemset[1] in left_terms)
+    assert eclat(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic, 1, left_terms, right_terms) == constrained
+
+
+def test_disk_apriori_matches_apriori():
+    transactions, items, all_spec, all_ic = random_transactions(0)
+    left_terms = set(["T" + str(term) for term in range(0, 8)])
+    right_terms = items - left_terms
+
+    for sides in [(None, None), (left_terms, right_terms)]:
+        table = apriori(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic, 1, sides[0], sides[1])
+
+        # A cap of a few hundred bytes sorts the candidates in many runs on disk
+        for memory_cap, workers in [(1 << 30, 1), (300, 1), (300, 2)]:
+            on_disk = disk_apriori(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic, workers, sides[0], sides[1],
+                                   memory_cap=memory_cap)
+
+            assert on_disk.keys() == table.keys()
+            for itemset_size in table:
+                assert len(on_disk[itemset_size]) == len(table[itemset_size])
+                assert set(on_disk[itemset_size]) == set(table[itemset_size])
+
+    assert ("T0", "T1", "T99") not in on_disk[3]
+    assert all(itemset in on_disk[3] for itemset in table[3])
+
+
+def test_lineage_pruning():
+    transactions, items, all_spec, all_ic = random_transactions(1)
+    # A binary tree over the terms: the parent of T(i) is T(i // 2)
+    all_parents = {}
+    for term in range(1, 20):
+        all_parents["T" + str(term)] = set()
+        parent = term // 2
+        while parent > 0:
+            all_parents["T" + str(term)].add("T" + str(parent))
+            parent = parent // 2
+
+    table = apriori(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic)
+    pruned = apriori(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic, 1, None, None, all_parents)
+
+    # Itemsets within one lineage are left out, and every other itemset is still found
+    assert shares_lineage(("T3", "T5", "T7"), all_parents) and not shares_lineage(("T2", "T3"), all_parents)
+    assert any(shares_lineage(itemset, all_parents) for itemset in table[2])
+    for itemset_size in table:
+        if itemset_size > 1:
+            assert set(pruned.get(itemset_size, set())) == \
+                set(itemset for itemset in table[itemset_size] if not shares_lineage(itemset, all_parents))
+
+    assert eclat(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic, 1, None, None, all_parents) == pruned
+    on_disk = disk_apriori(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic, 1, None, None, all_parents,
+                           memory_cap=300)
+    assert on_disk.keys() == pruned.keys()
+    for itemset_size in pruned:
+        assert set(on_disk[itemset_size]) == set(pruned[itemset_size])
@@ -0,0 +1,67 @@
+"""
+Filename: test_association_creation.py
+Author: Lily Wise
+
+Checks the association scores against counting genes one at a time.
+"""
+
+from apriori_algorithm import apriori, create_vertical_index
+from association_creation import score_associations, top_associations, association_score, \
+    collapse_implied_associations, select_associations, iter_associations
+from test_apriori_algorithm import random_transactions, scanned_support
+
+
+def test_score_associations_matches_scan():
+    transactions, items, all_spec, all_ic = random_transactions(0)
+    table = apriori(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic)
+    freq_itemsets = list(table[2]) + list(table[3])
+
+    for association, conf, cover in score_associations(transactions, freq_itemsets, all_spec):
+        assert conf == scanned_support(transactions, association) * all_spec[association[1]] * 100
+        assert cover == scanned_support(transactions, association[:1]) * all_spec[association[0]] * 10
+
+
+def test_top_associations_matches_sorting_all():
+    transactions, items, all_spec, all_ic = random_transactions(1)
+    table = apriori(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic)
+    freq_itemsets = list(table[2]) + list(table[3]) + list(table[4])
+    left_terms = set(["T" + str(term) for term in range(0, 12)])
+    right_terms = set(["T" + str(term) for term in range(6, 20)])
+
+    scored = []
+    for itemset in freq_itemsets:
+        for association in [list(itemset), list(itemset)[::-1]]:
+            if association[0] in left_terms and association[1] in right_terms:
+                score = association_score(list(itemset), association, scanned_support(transactions, association),
+                                          all_spec)
+                scored.append((score, tuple(association)))
+    scored.sort(reverse=True)
+
+    item_transactions = create_vertical_index(transactions)
+    for top_k in [0, 1, 5, 50, len(scored) + 10]:
+        top = top_associations(left_terms, right_terms, transactions, freq_itemsets, top_k, all_spec,
+                               item_transactions)
+        assert top == [(list(association), score) for score, association in scored[:top_k]]
+
+
+def test_collapse_implied_associations():
+    all_parents = {"T1": {"T0"}, "T2": {"T0", "T1"}, "T3": {"T0"}}
+    associations = [["A", "T0"], ["A", "T2"], ["A", "T1"], ["B", "T0"], ["B", "T3"], ["C", "T1"], ["C", "T3"]]
+
+    # A to T2 implies A to T1 and A to T0; B to T3 implies B to T0
+    assert collapse_implied_associations(associations, all_parents) == [["A", "T2"], ["B", "T3"], ["C", "T1"],
+                                                                       ["C", "T3"]]
+
+
+def test_iter_associations_matches_selecting_scored():
+    transactions, items, all_spec, all_ic = random_transactions(2)
+    table = apriori(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic)
+    freq_itemsets = list(table[2]) + list(table[3]) + list(table[4])
+    left_terms = set(["T" + str(term) for term in range(0, 12)])
+    right_terms = set(["T" + str(term) for term in range(6, 20)])
+    scored = score_associations(transactions, freq_itemsets, all_spec)
+
+    for min_confidence, min_coverage in [(0, 0), (20, 2), (50, 4)]:
+        assert list(iter_associations(left_terms, right_terms, transactions, iter(freq_itemsets), min_confidence,
+                                      min_coverage, all_spec)) == \
+            select_associations(left_terms, right_terms, scored, min_confidence, min_coverage)
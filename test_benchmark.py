@@ -0,0 +1,48 @@
+"""
+Filename: test_benchmark.py
+Author: Lily Wise
+
+Checks the synthetic inputs of the benchmark are read by the parsers, and every stage is timed.
+"""
+
+import random
+from ontology_parsing import hpo_parsing_onto, parsing_go
+from annotation_parsing import hpo_parsing_ann, parsing_ann
+from benchmark import synthetic_parents, write_synthetic_inputs, benchmark_pipeline
+
+
+def test_synthetic_parents():
+    parents = synthetic_parents(500, random.Random(0))
+
+    # Only the root has no parent, and every parent comes before its child, so there is no cycle
+    assert parents[0] == []
+    for term in range(1, 500):
+        assert 1 <= len(parents[term]) <= 2
+        assert all(parent < term for parent in parents[term])
+
+
+def test_synthetic_inputs_are_parsed(tmp_path):
+    filenames = write_synthetic_inputs(str(tmp_path), 400, 50, seed=1)
+
+    assert len(hpo_parsing_onto(filenames["hp_ontology"])) == 200
+    bp_tree, mf_tree, cc_tree = parsing_go(filenames["g_ontology"])
+    assert (len(bp_tree), len(mf_tree), len(cc_tree)) == (100, 50, 50)
+    assert len(hpo_parsing_ann(filenames["hp_annotations"])) == 50
+    gene_syn, bp_gt, mf_gt, cc_gt = parsing_ann(filenames["g_annotations"])
+    assert len(bp_gt) == len(mf_gt) == len(cc_gt) == 50
+
+    # The same seed writes the same inputs
+    first = open(filenames["hp_annotations"]).read()
+    write_synthetic_inputs(str(tmp_path), 400, 50, seed=1)
+    assert open(filenames["hp_annotations"]).read() == first
+
+
+def test_benchmark_pipeline(tmp_path):
+    filenames = write_synthetic_inputs(str(tmp_path), 400, 100)
+    result = benchmark_pipeline(filenames, "bp", 0.1, 0.1, 0.02, 0.1, 0.1)
+
+    assert [stage["stage"] for stage in result["stages"]] == \
+        ["parse_hp_ontology", "parse_go_ontology", "parse_hp_annotations", "parse_go_annotations", "closure",
+         "propagation", "ic", "specificity", "transactions", "mining", "associations"]
+    assert all(stage["wall_seconds"] >= 0 for stage in result["stages"])
+    assert result["genes"] == 100 and result["levels"]["1"] > 0
@@ -0,0 +1,32 @@
+"""
+Filename: test_main.py
+Author: Lily Wise
+
+Checks the helpers main.py uses between mining and writing the frequent itemsets.
+"""
+
+from main import left_freq_itemsets, LeftFreqItemsets
+from apriori_algorithm import apriori
+from disk_apriori_algorithm import disk_apriori
+from test_apriori_algorithm import random_transactions
+
+
+def test_left_freq_itemsets():
+    table = {2: [("A", "B"), ("B", "C"), ("C", "D"), ("D", "E"), ("A", "E")],
+             3: [("B", "C", "D"), ("C", "D", "E")]}
+
+    # Itemsets without a left term next to each other are all left out
+    assert left_freq_itemsets(table, {"A", "B"}) == [("A", "B"), ("B", "C"), ("A", "E"), ("B", "C", "D")]
+
+
+def test_left_freq_itemsets_on_disk():
+    transactions, items, all_spec, all_ic = random_transactions(0)
+    possible_left = set(["T" + str(term) for term in range(0, 8)])
+    table = apriori(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic)
+    on_disk = LeftFreqItemsets(disk_apriori(transactions, items, 0.1, 0.1, 0.1, all_spec, all_ic, memory_cap=300),
+                               possible_left)
+
+    # The itemsets are found again each time they are gone through
+    expected = sorted(left_freq_itemsets(table, possible_left), key=str)
+    assert sorted(on_disk, key=str) == expected
+    assert sorted(on_disk, key=str) == expected
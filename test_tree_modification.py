@@ -0,0 +1,94 @@
+"""
+Filename: test_tree_modification.py
+Author: Lily Wise
+
+Checks the tree functions against values worked out by hand for the small ontology and annotations in test_files/.
+"""
+
+from math import log10
+import os
+import ontology_parsing
+import annotation_parsing
+from tree_modification import terms_to_all_parents, gene_to_all_parents, calculate_ic, all_specificity, \
+    update_all_parents, update_gene_to_all_parents, update_ic, update_specificity
+
+test_direct = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_files")
+ontology_filename = os.path.join(test_direct, "ontology.txt")
+annotations_filename = os.path.join(test_direct, "annotations.txt")
+
+
+# Checks two dictionaries of floats have the same keys and nearly the same values.
+def assert_close(found, expected):
+    assert found.keys() == expected.keys()
+    for key in expected:
+        assert abs(found[key] - expected[key]) < 1e-12, key
+
+
+def test_terms_to_all_parents():
+    tree = ontology_parsing.testing_ontology_parsing(ontology_filename)
+
+    assert terms_to_all_parents(tree) == {"T0": set(), "T1": {"T0"}, "T2": {"T0"}, "T3": {"T0", "T1", "T2"},
+                                          "T4": {"T0", "T1", "T2", "T3"}, "T5": {"T0", "T2"}}
+
+
+def test_gene_to_all_parents():
+    tree = ontology_parsing.testing_ontology_parsing(ontology_filename)
+    gene_terms = annotation_parsing.testing_annotation_parsing(annotations_filename)
+
+    assert gene_to_all_parents(tree, gene_terms) == {"T0": {"G0", "G1", "G2", "G3"}, "T1": {"G0", "G1", "G2"},
+                                                     "T2": {"G0", "G1", "G3"}, "T3": {"G0", "G1"}, "T4": {"G0"},
+                                                     "T5": {"G1", "G3"}}
+
+
+def test_gene_to_all_parents_cycle():
+    tree = {"A": {"B"}, "B": {"A"}, "C": {"A"}}
+
+    assert gene_to_all_parents(tree, {"G0": ["C"], "G1": ["B"]}) == {"A": {"G0", "G1"}, "B": {"G0", "G1"},
+                                                                    "C": {"G0"}}
+
+
+def test_calculate_ic_and_specificity():
+    tree = ontology_parsing.testing_ontology_parsing(ontology_filename)
+    terms_genes = gene_to_all_parents(tree, annotation_parsing.testing_annotation_parsing(annotations_filename))
+
+    term_ic = calculate_ic(terms_genes)
+    expected_ic = {"T0": 0, "T1": -log10(3 / 4), "T2": -log10(3 / 4), "T3": -log10(2 / 4), "T4": -log10(1 / 4),
+                   "T5": -log10(2 / 4)}
+    assert_close(term_ic, expected_ic)
+
+    term_spec = all_specificity(terms_to_all_parents(tree), term_ic)
+    expected_spec = {"T0": 0, "T1": 0, "T2": 0, "T3": (expected_ic["T1"] + expected_ic["T2"]) / 6,
+                     "T4": (expected_ic["T1"] + expected_ic["T2"] + expected_ic["T3"]) / 6,
+                     "T5": expected_ic["T2"] / 6}
+    assert_close(term_spec, expected_spec)
+
+
+def test_update_matches_recreating():
+    old_tree = ontology_parsing.testing_ontology_parsing(ontology_filename)
+    old_gene_terms = annotation_parsing.testing_annotation_parsing(annotations_filename)
+    old_all_parents = terms_to_all_parents(old_tree)
+    old_terms_genes = gene_to_all_parents(old_tree, old_gene_terms)
+    old_ic = calculate_ic(old_terms_genes)
+    old_spec = all_specificity(old_all_parents, old_ic)
+
+    # Move T5 under T3, add T6 under T5, and change the annotations of two genes
+    tree = dict(old_tree)
+    tree["T5"] = {"T3"}
+    tree["T6"] = {"T5"}
+    gene_terms = dict(old_gene_terms)
+    gene_terms["G2"] = {"T6"}
+    gene_terms["G3"] = {"T4"}
+
+    all_parents, changed_parents = update_all_parents(tree, old_tree, old_all_parents)
+    assert all_parents == terms_to_all_parents(tree)
+    assert changed_parents == {"T5", "T6"}
+
+    terms_genes, changed_genes = update_gene_to_all_parents(tree, gene_terms, all_parents, old_tree, old_gene_terms,
+                                                            old_all_parents, old_terms_genes)
+    assert terms_genes == gene_to_all_parents(tree, gene_terms)
+
+    term_ic, changed_ic = update_ic(terms_genes, old_terms_genes, old_ic, changed_genes)
+    assert_close(term_ic, calculate_ic(terms_genes))
+
+    term_spec, changed_spec = update_specificity(all_parents, term_ic, old_spec, 6, changed_parents, changed_ic)
+    assert_close(term_spec, all_specificity(all_parents, term_ic))
@@ -6,6 +6,7 @@ All functions that modify or determine information about the annotation or ontol
 """
 
 from math import log10
+from bitsets import indices_to_bits, bits_to_indices
 
 
 # Calculates the specificity of every node in the tree using the information content.
@@ -83,90 +84,121 @@ def join_gt(hp_tg, bp_tg, mf_tg):
     return all_gt
 
 
-# Find all leaf nodes and add all of the genes to their parents.
+# Add all of the genes of every term to all of its ancestors. Terms are visited in reverse topological order, leaves
+# first, so each term's children are complete before the term is reached and every term is only visited once. Gene
+# sets are packed into integers (one bit per gene) while they are added up.
 #
 # param: tree_child_parent - tree that is child to parent
 # param: gene_to_terms - gene to terms it is annotated to
 # returns: terms to genes tree with all ancestors having all the terms below theirs genes
 def gene_to_all_parents(tree_child_parent, gene_to_terms):
     tree_parent_child = swap_key_value(tree_child_parent)
-    all_nodes = set()
     terms_to_genes = swap_key_value(gene_to_terms)
-    leaf_nodes = set()
-    to_check = set()
-
-    for node in set(tree_parent_child.keys()):
-        all_nodes.add(node)
-    for node in set(tree_child_parent.keys()):
-        all_nodes.add(node)
-
-    for node in all_nodes:
-        if node not in set(tree_parent_child.keys()):
-            leaf_nodes.add(node)
-
-    for node in leaf_nodes:
-        for parent in tree_child_parent[node]:
-            to_check.add(parent)
 
-    while len(to_check) != 0:
-        checking = to_check.pop()
-        if checking in tree_child_parent:
-            for parent in tree_child_parent[checking]:
-                to_check.add(parent)
-            terms_to_genes = gene_to_parent(checking, tree_parent_child, terms_to_genes)
+    genes = list(gene_to_terms.keys())
+    gene_index = {}
+    for index in range(0, len(genes)):
+        gene_index[genes[index]] = index
+
+    term_genes = {}
+    for term in terms_to_genes:
+        term_genes[term] = indices_to_bits(gene_index[gene] for gene in terms_to_genes[term])
+
+    # Count the children left to visit before each term can be visited
+    children_left = {}
+    to_visit = []
+    for node in set(tree_child_parent.keys()).union(tree_parent_child.keys()):
+        children_left[node] = len(tree_parent_child.get(node, ()))
+        if children_left[node] == 0:
+            to_visit.append(node)
+
+    propagated = set()
+    while len(to_visit) != 0:
+        node = to_visit.pop()
+        if node in tree_parent_child and node in tree_child_parent:
+            node_genes = term_genes.get(node, 0)
+            for child in tree_parent_child[node]:
+                node_genes |= term_genes.get(child, 0)
+            term_genes[node] = node_genes
+            propagated.add(node)
+
+        for parent in tree_child_parent.get(node, ()):
+            children_left[parent] -= 1
+            if children_left[parent] == 0:
+                to_visit.append(parent)
+
+    # Terms on a cycle are never reached above, so they are given the genes of everything below them on their own
+    for node in children_left:
+        if children_left[node] != 0 and node in tree_child_parent:
+            node_genes = term_genes.get(node, 0)
+            for child in reachable_parents(node, tree_parent_child):
+                node_genes |= term_genes.get(child, 0)
+            term_genes[node] = node_genes
+            propagated.add(node)
+
+    for node in propagated:
+        terms_to_genes[node] = set(genes[index] for index in bits_to_indices(term_genes[node]))
 
     return terms_to_genes
 
 
-# Add all gene_carry genes to the current node. Add current nodes
-# genes to gene_carry and then call for all parents of current node
-# this function until there are no parents left to call.
-#
-# param: node - the current node in the tree
-# param: tree - a dictionary; key: term, value: set of parent terms
-# param: gene_to_terms - a dictionary; key: gene, value: set of terms that it is annotated to
-# return: new_gene_to_terms - updated gene_to_terms with the node that was called having all of its children's genes
-def gene_to_parent(node, tree, terms_to_genes):
-    new_terms_to_genes = terms_to_genes
-
-    for child in tree[node]:
-        if node not in new_terms_to_genes:
-            new_terms_to_genes[node] = set()
-        if child in new_terms_to_genes:
-            for c in new_terms_to_genes[child]:
-                new_terms_to_genes[node].add(c)
-
-    return new_terms_to_genes
-
-
-# Find root node and move down through the tree until all terms transitively know their parents.
+# Finds all parents transitively of every term. Terms are visited in topological order, every root first, so each
+# term's parents are complete before the term is reached and every term is only visited once.
 #
 # param: tree_child_parent - dictionary; key: term, value: set of parents
 # returns: dictionary; key: term, value: set of transitive parents
 def terms_to_all_parents(tree_child_parent):
-    new_tree_child_parent = tree_child_parent
-    tree_parent_child = swap_key_value(new_tree_child_parent)
+    tree_parent_child = swap_key_value(tree_child_parent)
+    all_parents = {}
+
+    # Count the parents left to visit before each term can be visited
+    parents_left = {}
+    to_visit = []
+    for node in set(tree_child_parent.keys()).union(tree_parent_child.keys()):
+        parents_left[node] = len(tree_child_parent.get(node, ()))
+        if parents_left[node] == 0:
+            to_visit.append(node)
+
+    while len(to_visit) != 0:
+        node = to_visit.pop()
+        node_parents = set()
+        for parent in tree_child_parent.get(node, ()):
+            node_parents.add(parent)
+            node_parents.update(all_parents[parent])
+        all_parents[node] = node_parents
+
+        for child in tree_parent_child.get(node, ()):
+            parents_left[child] -= 1
+            if parents_left[child] == 0:
+                to_visit.append(child)
+
+    # Terms on a cycle are never reached above, so they are searched on their own
+    for node in parents_left:
+        if node not in all_parents:
+            all_parents[node] = reachable_parents(node, tree_child_parent)
+
+    new_tree_child_parent = {}
+    for node in tree_child_parent:
+        new_tree_child_parent[node] = all_parents[node]
 
-    # Find the root
-    root = ''
-    for node in new_tree_child_parent:
-        if len(new_tree_child_parent[node]) == 0 and node in tree_parent_child:
-            root = node
+    return new_tree_child_parent
 
-    # Check each of the nodes starting at the root and moving down through the tree.
-    to_check = []
-    for child in tree_parent_child[root]:
-        to_check.append(child)
 
+# Finds all parents transitively of one term by searching up the tree.
+#
+# param: node - the term
+# param: tree_child_parent - dictionary; key: term, value: set of parents
+# returns: set of transitive parents
+def reachable_parents(node, tree_child_parent):
+    found = set()
+    to_check = list(tree_child_parent.get(node, ()))
     while len(to_check) != 0:
-        cur_check = to_check.pop()
-        add_parents(cur_check, new_tree_child_parent)
-
-        if cur_check in tree_parent_child:
-            for child in tree_parent_child[cur_check]:
-                to_check.append(child)
+        parent = to_check.pop()
+        if parent not in found:
+            found.add(parent)
+            to_check.extend(tree_child_parent.get(parent, ()))
 
-    return new_tree_child_parent
+    return found
 
 
 # Joins to trees together into one tree.
@@ -187,31 +219,273 @@ def join_two(tree, hp_tree):
     return combined_tree
 
 
-# Adds all parents transitively to the current node.
-#
-# param: node - the current node in the tree
-# param: tree - a dictionary; key: term, value: set of parent terms (is modified in this function)
-def add_parents(node, tree_child_parent):
-    for parents in tree_child_parent[node]:
-        tree_child_parent[node] = tree_child_parent[node].union(tree_child_parent[parents])
-
-
 # Calculates information content of every term of the tree
 #
 # param: tree - the tree; key: term, value: genes annotated to that term (with transitive property)
 # return: term_ic - dictionary; key: term, value: information content of that term
 def calculate_ic(tree):
-    term_ic = {}  # key: term, value: ic
-    distinct_genes = set()
+    gene_count = len(set().union(*tree.values()))
 
+    term_ic = {}  # key: term, value: ic
     for term in tree:
-        term_ic[term] = len(tree[term])
-
-        distinct_genes = distinct_genes.union(tree[term])
-
-    for term in term_ic:
-        term_ic[term] /= len(distinct_genes)
+        term_ic[term] = len(tree[term]) / gene_count
         if term_ic[term] != 0:
             term_ic[term] = -log10(term_ic[term])
 
     return term_ic
+
+
+# Finds the terms whose parents are not the same in two versions of a tree, including terms only in one of them.
+#
+# param: old_tree - dictionary; key: term, value: set of parents, before
+# param: new_tree - dictionary; key: term, value: set of parents, after
+# returns: set of the terms that changed
+def changed_terms(old_tree, new_tree):
+    changed = set()
+
+    for node in old_tree:
+        if node not in new_tree or set(old_tree[node]) != set(new_tree[node]):
+            changed.add(node)
+    for node in new_tree:
+        if node not in old_tree:
+            changed.add(node)
+
+    return changed
+
+
+# Finds everything that can be reached from some nodes by following links.
+#
+# param: nodes - the nodes to start from
+# param: links - dictionary; key: node, value: set of nodes it links to
+# returns: set of the nodes reached, including the nodes started from
+def reachable(nodes, links):
+    found = set(nodes)
+    to_check = list(found)
+    while len(to_check) != 0:
+        node = to_check.pop()
+        for linked in links.get(node, ()):
+            if linked not in found:
+                found.add(linked)
+                to_check.append(linked)
+
+    return found
+
+
+# Orders some nodes so that each comes after every node it links to among them. Nodes on a cycle come last.
+#
+# param: nodes - the nodes to order
+# param: links - dictionary; key: node, value: set of nodes it links to
+# returns: list of the nodes in order
+def linked_order(nodes, links):
+    backlinks = {}
+    links_left = {}
+    to_visit = []
+    for node in nodes:
+        links_left[node] = 0
+        for linked in links.get(node, ()):
+            if linked in nodes:
+                links_left[node] += 1
+                if linked not in backlinks:
+                    backlinks[linked] = []
+                backlinks[linked].append(node)
+        if links_left[node] == 0:
+            to_visit.append(node)
+
+    order = []
+    while len(to_visit) != 0:
+        node = to_visit.pop()
+        order.append(node)
+        for backlinked in backlinks.get(node, ()):
+            links_left[backlinked] -= 1
+            if links_left[backlinked] == 0:
+                to_visit.append(backlinked)
+
+    for node in nodes:
+        if links_left[node] != 0:
+            order.append(node)
+
+    return order
+
+
+# Updates the transitive parents of a tree after the tree changed. Only the terms that changed and their descendants
+# (before or after the change) are worked out again, in topological order; the rest keep their old parents.
+#
+# param: tree_child_parent - dictionary; key: term, value: set of parents, after the change
+# param: old_tree_child_parent - dictionary; key: term, value: set of parents, before the change
+# param: old_all_parents - terms_to_all_parents of the tree before the change
+# returns: all_parents - dictionary; key: term, value: set of transitive parents
+# returns: changed - set of the terms whose transitive parents changed, were added or were removed
+def update_all_parents(tree_child_parent, old_tree_child_parent, old_all_parents):
+    changed = changed_terms(old_tree_child_parent, tree_child_parent)
+    affected = reachable(changed, swap_key_value(tree_child_parent))
+    affected.update(reachable(changed, swap_key_value(old_tree_child_parent)))
+
+    new_parents = {}
+    for node in linked_order(affected, tree_child_parent):
+        if node in new_parents:
+            continue
+        node_parents = set()
+        for parent in tree_child_parent.get(node, ()):
+            node_parents.add(parent)
+            if parent in new_parents:
+                node_parents.update(new_parents[parent])
+            elif parent in affected:
+                # The parent is on a cycle with this term, so search up from this term instead
+                node_parents = reachable_parents(node, tree_child_parent)
+                break
+            else:
+                node_parents.update(old_all_parents.get(parent, ()))
+        new_parents[node] = node_parents
+
+    all_parents = {}
+    changed = set()
+    for node in tree_child_parent:
+        if node in affected:
+            all_parents[node] = new_parents[node]
+            if node not in old_all_parents or old_all_parents[node] != all_parents[node]:
+                changed.add(node)
+        else:
+            all_parents[node] = old_all_parents[node]
+    for node in old_all_parents:
+        if node not in all_parents:
+            changed.add(node)
+
+    return all_parents, changed
+
+
+# Updates the genes of every term, with all of its descendants' genes, after the tree or the annotations changed. Only
+# the terms that changed and their ancestors (before or after the change) are worked out again, leaves first; the rest
+# keep their old genes. Gives the same result as gene_to_all_parents on the changed tree and annotations.
+#
+# param: tree_child_parent - tree that is child to parent, after the change
+# param: gene_to_terms - gene to terms it is annotated to, after the change
+# param: all_parents - terms_to_all_parents of the tree after the change
+# param: old_tree_child_parent - tree that is child to parent, before the change
+# param: old_gene_to_terms - gene to terms it is annotated to, before the change
+# param: old_all_parents - terms_to_all_parents of the tree before the change
+# param: old_terms_to_genes - gene_to_all_parents of the tree and annotations before the change
+# returns: terms_to_genes - terms to genes tree with all ancestors having all the terms below theirs genes
+# returns: changed - set of the terms whose genes changed, were added or were removed
+def update_gene_to_all_parents(tree_child_parent, gene_to_terms, all_parents, old_tree_child_parent,
+                               old_gene_to_terms, old_all_parents, old_terms_to_genes):
+    tree_parent_child = swap_key_value(tree_child_parent)
+    own_genes = swap_key_value(gene_to_terms)
+    old_own_genes = swap_key_value(old_gene_to_terms)
+
+    changed = changed_terms(old_tree_child_parent, tree_child_parent)
+    changed.update(changed_terms(old_own_genes, own_genes))
+
+    affected = set(changed)
+    for node in changed:
+        affected.update(all_parents.get(node, ()))
+        affected.update(old_all_parents.get(node, ()))
+
+    new_genes = {}
+    for node in linked_order(affected, tree_parent_child):
+        if node in tree_parent_child and node in tree_child_parent:
+            node_genes = set(own_genes.get(node, ()))
+            for child in tree_parent_child[node]:
+                if child in new_genes:
+                    node_genes.update(new_genes[child])
+                elif child in affected:
+                    # The child is on a cycle with this term, so search down from this term instead
+                    for descendant in reachable_parents(node, tree_parent_child):
+                        node_genes.update(own_genes.get(descendant, ()))
+                    break
+                else:
+                    node_genes.update(old_terms_to_genes.get(child, ()))
+            new_genes[node] = node_genes
+        elif node in own_genes:
+            new_genes[node] = own_genes[node]
+
+    terms_to_genes = {}
+    changed = set()
+    for node in old_terms_to_genes:
+        if node not in affected:
+            terms_to_genes[node] = old_terms_to_genes[node]
+        elif node not in new_genes:
+            changed.add(node)
+    for node in new_genes:
+        terms_to_genes[node] = new_genes[node]
+        if node not in old_terms_to_genes or old_terms_to_genes[node] != new_genes[node]:
+            changed.add(node)
+
+    return terms_to_genes, changed
+
+
+# Updates the information content of every term after the genes of some terms changed. If the number of genes with
+# any term changed, every term's information content changes and all of them are worked out again.
+#
+# param: tree - the tree; key: term, value: genes annotated to that term (with transitive property), after the change
+# param: old_tree - the same, before the change
+# param: old_ic - calculate_ic of the tree before the change
+# param: changed_genes - set of the terms whose genes changed, were added or were removed
+# returns: term_ic - dictionary; key: term, value: information content of that term
+# returns: changed - set of the terms whose information content changed, was added or was removed
+def update_ic(tree, old_tree, old_ic, changed_genes):
+    gene_count = len(set().union(*tree.values()))
+    if gene_count != len(set().union(*old_tree.values())):
+        term_ic = calculate_ic(tree)
+        changed = set(old_ic.keys()).symmetric_difference(term_ic.keys())
+        for term in term_ic:
+            if term in old_ic and old_ic[term] != term_ic[term]:
+                changed.add(term)
+        return term_ic, changed
+
+    term_ic = {}
+    changed = set()
+    for term in tree:
+        if term in changed_genes or term not in old_ic:
+            term_ic[term] = len(tree[term]) / gene_count
+            if term_ic[term] != 0:
+                term_ic[term] = -log10(term_ic[term])
+            if term not in old_ic or old_ic[term] != term_ic[term]:
+                changed.add(term)
+        else:
+            term_ic[term] = old_ic[term]
+    for term in old_ic:
+        if term not in term_ic:
+            changed.add(term)
+
+    return term_ic, changed
+
+
+# Updates the specificity of every term after its transitive parents or their information content changed. If the
+# number of terms in the tree changed, every term's specificity changes and all of them are worked out again.
+#
+# param: tree - dictionary; key: term, value: all parents (transitively), after the change
+# param: tree_ic - dictionary; key: term, value: information content of that term, after the change
+# param: old_spec - all_specificity of the tree before the change
+# param: old_node_count - the number of terms and parents in the tree before the change
+# param: changed_parents - set of the terms whose transitive parents changed, were added or were removed
+# param: changed_ic - set of the terms whose information content changed, was added or was removed
+# returns: term_spec - dictionary, key: term, value: specificity
+# returns: changed - set of the terms whose specificity changed, was added or was removed
+def update_specificity(tree, tree_ic, old_spec, old_node_count, changed_parents, changed_ic):
+    node_count = len(set(tree.keys()).union(*tree.values()))
+    if node_count != old_node_count:
+        term_spec = all_specificity(tree, tree_ic)
+        changed = set(old_spec.keys()).symmetric_difference(term_spec.keys())
+        for term in term_spec:
+            if term in old_spec and old_spec[term] != term_spec[term]:
+                changed.add(term)
+        return term_spec, changed
+
+    term_spec = {}
+    changed = set()
+    for node in tree:
+        if node in changed_parents or node not in old_spec or not changed_ic.isdisjoint(tree[node]):
+            term_spec[node] = 0
+            for parent in tree[node]:
+                if parent in tree_ic:
+                    term_spec[node] += tree_ic[parent]
+            term_spec[node] /= node_count
+            if node not in old_spec or old_spec[node] != term_spec[node]:
+                changed.add(node)
+        else:
+            term_spec[node] = old_spec[node]
+    for node in old_spec:
+        if node not in term_spec:
+            changed.add(node)
+
+    return term_spec, changed